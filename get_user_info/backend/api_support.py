@@ -0,0 +1,50 @@
+"""
+Flask setup shared by the survey server (get_user_info/server.py) and the
+recommendation backend (get_user_info/backend/app.py)
+"""
+import os
+import logging
+from flask.json.provider import DefaultJSONProvider
+from flask_cors import CORS
+
+# Prefer orjson for JSON request/response bodies when it's installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with Flask's sorted keys and its fallbacks (e.g. http_date for datetimes)"""
+    def dumps(self, obj, **kwargs):
+        # Datetimes are passed through to default() so they keep Flask's format rather than orjson's ISO 8601
+        options = (
+            orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+        return orjson.dumps(obj, default=self.default, option=options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+def configure_app(app, *logger_names):
+    """Set up logging, CORS and JSON for an API app; returns True when ENVIRONMENT=production
+
+    Call after the .env file is loaded. Logging defaults to INFO, so third-party loggers (openai,
+    httpx, urllib3) never write request payloads at DEBUG. Outside production the app's own
+    loggers (app.logger plus logger_names) log DEBUG detail; in production they log WARNING
+    and up. LOG_LEVEL (e.g. DEBUG) overrides all of these.
+    """
+    production = os.environ.get("ENVIRONMENT") == "production"
+    log_level = os.environ.get("LOG_LEVEL", "").upper()
+    logging.basicConfig(level=log_level or "INFO", format="%(message)s")
+    app_level = log_level or ("WARNING" if production else "DEBUG")
+    for logger in [app.logger] + [logging.getLogger(name) for name in logger_names]:
+        logger.setLevel(app_level)
+    
+    # Enable CORS for all routes; browsers may cache a preflight answer for a day.
+    # Preflight (OPTIONS) requests are answered here and by Flask, so views only list POST/GET.
+    CORS(app, methods=["GET", "POST", "OPTIONS"], max_age=86400)
+    
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    return production
@@ -1,15 +1,13 @@
 from flask import Flask, request, jsonify
-from flask_cors import CORS
-import pandas as pd
 import numpy as np
 import os
+import csv
+import functools
+import logging
 from datetime import datetime
-from openai import OpenAI
 from dotenv import load_dotenv
 from pathlib import Path
-
-app = Flask(__name__)
-CORS(app)
+from api_support import configure_app
 
 # Get the current directory (where app.py is located)
 BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -18,8 +16,15 @@ PARENT_DIR = os.path.dirname(BACKEND_DIR)
 # Load environment variables
 load_dotenv(os.path.join(PARENT_DIR, ".env"))
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+app = Flask(__name__)
+PRODUCTION = configure_app(app, __name__)
+logger = logging.getLogger(__name__)
+
+# Initialize the OpenAI client on first use so the SDK isn't imported at startup
+@functools.lru_cache(maxsize=1)
+def get_client():
+    from openai import OpenAI
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 # Path for user pool data
 USER_POOL_PATH = os.path.join(PARENT_DIR, "user_pool.csv")
@@ -37,12 +42,39 @@ REQUIRED_FIELDS = [
 
 # ✅ 嵌入函数
 def embed_answer_list(answer_list):
-    response = client.embeddings.create(
+    response = get_client().embeddings.create(
         input=answer_list,
         model="text-embedding-ada-002"
     )
     return [r.embedding for r in response.data]
 
+# Maximum number of inputs accepted by one embeddings request
+EMBED_BATCH_SIZE = 2048
+
+def embed_unique_texts(texts):
+    """Embed each distinct text once, batching requests, and return a text -> embedding dict"""
+    unique_texts = list(dict.fromkeys(texts))
+    embeddings = {}
+    for start in range(0, len(unique_texts), EMBED_BATCH_SIZE):
+        batch = unique_texts[start:start + EMBED_BATCH_SIZE]
+        embeddings.update(zip(batch, embed_answer_list(batch)))
+    return embeddings
+
+# User pool as last read from disk, with the file's modification time when it was read
+_user_pool_cache = {"mtime": None, "data": None}
+
+def load_user_pool():
+    """Read the user pool CSV, reusing the parsed DataFrame until the file changes"""
+    import pandas as pd
+    mtime = os.path.getmtime(USER_POOL_PATH)
+    if _user_pool_cache["mtime"] != mtime:
+        try:
+            user_pool = pd.read_csv(USER_POOL_PATH, encoding="utf-8")
+        except UnicodeDecodeError:
+            user_pool = pd.read_csv(USER_POOL_PATH, encoding="ISO-8859-1")
+        _user_pool_cache.update(mtime=mtime, data=user_pool)
+    return _user_pool_cache["data"]
+
 # ✅ 计算余弦相似度
 def cosine_similarity(a, b):
     return np.dot(a, b)
@@ -57,16 +89,11 @@ def get_top_matches(similarity_matrix, weights, top_k=3):
     return top_users
 
 # ✅ /api/submit — 仅保存用户答案
-@app.route("/api/submit", methods=["POST", "OPTIONS"])
+@app.route("/api/submit", methods=["POST"])
 def submit():
-    # Handle OPTIONS request for CORS
-    if request.method == "OPTIONS":
-        response = app.make_default_options_response()
-        return response
-        
     # Handle both JSON and form data
     if request.is_json:
-        data = request.json
+        data = request.get_json(cache=False)
         if "answers" in data:
             answers = data["answers"]
         else:
@@ -75,48 +102,55 @@ def submit():
         # Process form data
         answers = request.form.to_dict()
     
-    # No validation needed - we'll use defaults for missing fields in the main application
+    # No validation needed - we'll use defaults for missing fields in the main application.
+    # A list of answers (the /api/recommend shape) is saved as one row under numbered columns,
+    # as a one-row DataFrame would; anything else can't be written as a row.
+    if isinstance(answers, list):
+        answers = {str(i): value for i, value in enumerate(answers)}
+    elif not isinstance(answers, dict):
+        return jsonify({ "error": "Answers must be an object or a list" }), 400
     
     # 保存文件
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     filename = f"user_answer_{timestamp}.csv"
     
-    # Ensure the backend directory exists
-    os.makedirs(BACKEND_DIR, exist_ok=True)
-    
     # Save CSV in the backend directory
     filepath = os.path.join(BACKEND_DIR, filename)
     
-    # Create dataframe and save to CSV
-    df = pd.DataFrame([answers])
-    df.to_csv(filepath, index=False)
+    # Write the header and the single answer row directly (same output as a one-row
+    # DataFrame's to_csv, without importing pandas or building a DataFrame)
+    with open(filepath, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(answers.keys()), lineterminator=os.linesep)
+        writer.writeheader()
+        writer.writerow(answers)
     
-    print(f"✅ Saved user answer to: {filepath}")
+    logger.debug("✅ Saved user answer to: %s", filepath)
     
     return jsonify({ "saved_as": filename })
 
 # ✅ /api/recommend — 根据前端传入的 answers 返回推荐用户
 @app.route("/api/recommend", methods=["POST"])
 def recommend():
-    data = request.json
-    answers = data["answers"]
-
-    # 嵌入新用户答案
-    sample_embed = [embed_answer_list([str(v)])[0] for v in answers]
-
-    # 嵌入用户池
-    try:
-        user_pool = pd.read_csv(USER_POOL_PATH, encoding="utf-8")
-    except UnicodeDecodeError:
-        user_pool = pd.read_csv(USER_POOL_PATH, encoding="ISO-8859-1")
-        
-    pool_embed = []
-    for _, row in user_pool.iterrows():
-        row_embed = []
-        for val in row:
-            val_str = str(val) if pd.notna(val) else "N/A"
-            row_embed.append(embed_answer_list([val_str])[0])
-        pool_embed.append(row_embed)
+    # Parse the body once; a missing or malformed body gets a 400 instead of raising
+    data = request.get_json(cache=False, silent=True) or {}
+    answers = data.get("answers")
+    if not answers:
+        return jsonify({ "error": "No answers provided" }), 400
+
+    # 读取用户池
+    import pandas as pd
+    user_pool = load_user_pool()
+
+    sample_texts = [str(v) for v in answers]
+    pool_texts = [
+        [str(val) if pd.notna(val) else "N/A" for val in row]
+        for _, row in user_pool.iterrows()
+    ]
+
+    # 嵌入新用户答案和用户池 — repeated answers ("N/A", common countries, ...) are embedded only once
+    embeddings = embed_unique_texts(sample_texts + [text for row in pool_texts for text in row])
+    sample_embed = [embeddings[text] for text in sample_texts]
+    pool_embed = [[embeddings[text] for text in row] for row in pool_texts]
 
     # 相似度计算
     similarity_matrix = []
@@ -126,15 +160,21 @@ def recommend():
 
     # Top 推荐
     top_matches = get_top_matches(similarity_matrix, WEIGHTS)
-    recommendations = []
-    for idx, score in top_matches:
-        name = user_pool.iloc[idx]['real_name'] if 'real_name' in user_pool.columns else user_pool.iloc[idx][0]
-        recommendations.append({ "index": idx, "score": score, "name": name })
+    name_col = user_pool.columns.get_loc('real_name') if 'real_name' in user_pool.columns else 0
+    names = user_pool.iloc[[idx for idx, _ in top_matches], name_col].tolist()
+    recommendations = [
+        { "index": idx, "score": score, "name": name }
+        for (idx, score), name in zip(top_matches, names)
+    ]
 
     return jsonify({ "recommendations": recommendations })
 
 # ✅ 启动服务器
 if __name__ == "__main__":
-    print(f"Backend directory: {BACKEND_DIR}")
-    print(f"User pool path: {USER_POOL_PATH}")
-    app.run(debug=True)
\ No newline at end of file
+    logger.info("Backend directory: %s", BACKEND_DIR)
+    logger.info("User pool path: %s", USER_POOL_PATH)
+    # The debug reloader runs the app in a second process that re-imports pandas and the
+    # OpenAI SDK, so it's off in production. /api/recommend spends most of its time waiting
+    # on the embeddings API, so deploy under threaded WSGI workers, e.g.
+    #   gunicorn --preload --workers 2 --worker-class gthread --threads 8 --bind 0.0.0.0:$PORT app:app
+    app.run(debug=not PRODUCTION)
\ No newline at end of file
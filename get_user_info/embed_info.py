@@ -7,6 +7,7 @@ import hashlib
 from openai import OpenAI
 from dotenv import load_dotenv
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Add optional rich support for beautiful console output
 try:
@@ -26,6 +27,11 @@ CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Go up one level to get the parent directory
 PARENT_DIR = os.path.dirname(CURRENT_DIR)
 
+# Number of potential partners embedded in parallel (bounded to stay under API rate limits)
+EMBEDDING_WORKERS = 8
+# Number of user pool rows sent per embeddings request (kept well under the 2048-input limit)
+ROWS_PER_EMBEDDING_REQUEST = 100
+
 # Functions for pretty printing
 def print_header(text, emoji="✨", color="blue"):
     if HAS_RICH:
@@ -105,16 +111,20 @@ def get_latest_user_answer():
     """
     backend_dir = os.path.join(CURRENT_DIR, "backend")
     
-    # List all user answer files
-    csv_files = [f for f in os.listdir(backend_dir) if f.startswith("user_answer") and f.endswith(".csv")]
-    if not csv_files:
+    # Find the most recently modified user answer file in one directory pass
+    # (scandir entries carry their path, and only the newest file so far is kept)
+    latest_entry = None
+    with os.scandir(backend_dir) as entries:
+        for entry in entries:
+            if entry.name.startswith("user_answer") and entry.name.endswith(".csv"):
+                if latest_entry is None or entry.stat().st_mtime > latest_entry.stat().st_mtime:
+                    latest_entry = entry
+    if latest_entry is None:
         print_error("No user answer files found.")
         return None, None, None
     
-    # Sort by modified time (newest first)
-    csv_files.sort(key=lambda x: os.path.getmtime(os.path.join(backend_dir, x)), reverse=True)
-    latest_file = csv_files[0]
-    filepath = os.path.join(backend_dir, latest_file)
+    latest_file = latest_entry.name
+    filepath = latest_entry.path
     
     print_info(f"Using latest file: {latest_file}")
     
@@ -210,6 +220,36 @@ def embed_answer_list(answer_list):
     )
     return [r.embedding for r in response.data]
 
+# Function to embed a group of user pool rows
+def embed_pool_users(pool_rows):
+    """
+    Create embeddings for every answer of several potential partners in one request.
+    
+    Args:
+        pool_rows (list): Answer value lists, one per user pool row
+        
+    Returns:
+        list: One list of embeddings per row, in the same order
+    """
+    answer_texts = []
+    for old_user_answer in pool_rows:
+        for value in old_user_answer:
+            if isinstance(value, str):
+                answer_texts.append(value)
+            elif pd.isna(value):
+                answer_texts.append("N/A")
+            else:
+                answer_texts.append(str(value))
+    
+    # Embed all rows in a single request, then split the results back per row
+    embeddings = embed_answer_list(answer_texts) if answer_texts else []
+    row_embeddings = []
+    start = 0
+    for old_user_answer in pool_rows:
+        row_embeddings.append(embeddings[start:start + len(old_user_answer)])
+        start += len(old_user_answer)
+    return row_embeddings
+
 
 # Calculate cosine similarity between two vectors
 def cosine_similarity(a, b):
@@ -309,12 +349,10 @@ def save_top_matches(top_matches, user_pool, output_dir=None, output_name=None):
     
     output_path = os.path.join(output_dir, output_name)
     
-    # Extract data and scores
-    top_users_data = []
-    for idx, score in top_matches:
-        user_data = user_pool.iloc[idx].to_dict()
+    # Extract data for all matches in one selection, then attach scores
+    top_users_data = user_pool.iloc[[idx for idx, _ in top_matches]].to_dict('records')
+    for user_data, (idx, score) in zip(top_users_data, top_matches):
         user_data['match_score'] = score
-        top_users_data.append(user_data)
     
     # Create DataFrame and save - explicitly use UTF-8 encoding
     df = pd.DataFrame(top_users_data)
@@ -454,81 +492,70 @@ def run_matching(user_answers=None, weights=None, top_k=5, output_dir=None):
     # Create embeddings for user answers
     print_header("CREATING EMBEDDINGS", emoji="🧠", color="blue")
     print_info("Creating embeddings for user answers...")
-    sample_embedded_list = []
+    answer_texts = []
     for value in user_answers:
         if isinstance(value, str):
-            sample_embedded = embed_answer_list([value])
-            sample_embedded_list.append(sample_embedded[0])
+            answer_texts.append(value)
         else:
             # Convert non-string values to strings
-            value_str = str(value) if not pd.isna(value) else "N/A"
-            sample_embedded = embed_answer_list([value_str])
-            sample_embedded_list.append(sample_embedded[0])
+            answer_texts.append(str(value) if not pd.isna(value) else "N/A")
     
-    # Get user pool file path to use for caching
-    if hasattr(user_pool, 'filepath'):
-        user_pool_path = user_pool.filepath
-    else:
-        # Find where the user pool was loaded from
-        for potential_path in [
-            os.path.join(CURRENT_DIR, "user_pool.csv"),
-            os.path.join(PARENT_DIR, "user_pool.csv")
-        ]:
-            if os.path.exists(potential_path):
-                user_pool_path = potential_path
-                break
+    # Embed all answers in a single request, in the background while the pool embeddings load;
+    # the with block shuts the worker down even if loading the pool fails
+    with ThreadPoolExecutor(max_workers=1) as answers_executor:
+        sample_future = answers_executor.submit(embed_answer_list, answer_texts) if answer_texts else None
+        
+        # Get user pool file path to use for caching
+        if hasattr(user_pool, 'filepath'):
+            user_pool_path = user_pool.filepath
         else:
-            # If we can't determine the path, use a path in the current directory
-            user_pool_path = os.path.join(os.getcwd(), "user_pool.csv")
-    
-    # Try to load cached embeddings
-    pool_embedded_lists, is_cache_valid = load_cached_embeddings(user_pool_path)
-    
-    # Create embeddings for user pool if no valid cache
-    if not is_cache_valid:
-        print_info("Creating new embeddings for potential partners...")
-        pool_embedded_lists = []
+            # Find where the user pool was loaded from
+            for potential_path in [
+                os.path.join(CURRENT_DIR, "user_pool.csv"),
+                os.path.join(PARENT_DIR, "user_pool.csv")
+            ]:
+                if os.path.exists(potential_path):
+                    user_pool_path = potential_path
+                    break
+            else:
+                # If we can't determine the path, use a path in the current directory
+                user_pool_path = os.path.join(os.getcwd(), "user_pool.csv")
         
-        if HAS_RICH:
-            # Use rich progress bar
-            for idx in track(range(len(user_pool)), description="Embedding potential partners"):
-                old_user_answer = user_pool.iloc[idx].tolist()
-                embed_old_user_answer = []
-                for col_idx, value in enumerate(old_user_answer):
-                    column_name = user_pool.columns[col_idx]
-                    if isinstance(value, str):
-                        pool_embedded = embed_answer_list([value])
-                        embed_old_user_answer.append(pool_embedded[0])
-                    elif pd.isna(value):
-                        pool_embedded = embed_answer_list(["N/A"])
-                        embed_old_user_answer.append(pool_embedded[0])
-                    else:
-                        pool_embedded = embed_answer_list([str(value)])
-                        embed_old_user_answer.append(pool_embedded[0])
-                pool_embedded_lists.append(embed_old_user_answer)
+        # Try to load cached embeddings
+        pool_embedded_lists, is_cache_valid = load_cached_embeddings(user_pool_path)
+        
+        # Create embeddings for user pool if no valid cache
+        if not is_cache_valid:
+            print_info("Creating new embeddings for potential partners...")
+            pool_embedded_lists = []
+            
+            # Embed groups of potential partners concurrently; results come back in pool order
+            pool_rows = [user_pool.iloc[idx].tolist() for idx in range(len(user_pool))]
+            row_groups = [
+                pool_rows[start:start + ROWS_PER_EMBEDDING_REQUEST]
+                for start in range(0, len(pool_rows), ROWS_PER_EMBEDDING_REQUEST)
+            ]
+            with ThreadPoolExecutor(max_workers=EMBEDDING_WORKERS) as executor:
+                group_results = executor.map(embed_pool_users, row_groups)
+                results = (row_embeds for group in group_results for row_embeds in group)
+                
+                if HAS_RICH:
+                    # Use rich progress bar
+                    for embed_old_user_answer in track(results, total=len(user_pool), description="Embedding potential partners"):
+                        pool_embedded_lists.append(embed_old_user_answer)
+                else:
+                    # Basic output
+                    for idx, embed_old_user_answer in enumerate(results):
+                        print(f"  Embedded potential partner {idx+1}/{len(user_pool)}")
+                        pool_embedded_lists.append(embed_old_user_answer)
+            
+            # Save the embeddings for future use
+            save_embeddings_cache(pool_embedded_lists, user_pool_path)
         else:
-            # Basic output
-            for idx in range(len(user_pool)):
-                print(f"  Embedding potential partner {idx+1}/{len(user_pool)}")
-                old_user_answer = user_pool.iloc[idx].tolist()
-                embed_old_user_answer = []
-                for col_idx, value in enumerate(old_user_answer):
-                    column_name = user_pool.columns[col_idx]
-                    if isinstance(value, str):
-                        pool_embedded = embed_answer_list([value])
-                        embed_old_user_answer.append(pool_embedded[0])
-                    elif pd.isna(value):
-                        pool_embedded = embed_answer_list(["N/A"])
-                        embed_old_user_answer.append(pool_embedded[0])
-                    else:
-                        pool_embedded = embed_answer_list([str(value)])
-                        embed_old_user_answer.append(pool_embedded[0])
-                pool_embedded_lists.append(embed_old_user_answer)
+            print_info("Using cached embeddings for potential partners.")
         
-        # Save the embeddings for future use
-        save_embeddings_cache(pool_embedded_lists, user_pool_path)
-    else:
-        print_info("Using cached embeddings for potential partners.")
+        # Wait for the user answer embeddings
+        sample_embedded_list = sample_future.result() if sample_future else []
     
     # Calculate similarity matrix
     print_header("CALCULATING MATCH SCORES", emoji="🧮", color="cyan")
@@ -552,8 +579,8 @@ def run_matching(user_answers=None, weights=None, top_k=5, output_dir=None):
     
     # Print results
     print_header("TOP TRAVEL PARTNER MATCHES", emoji="🤝", color="green")
-    for i, (idx, score) in enumerate(top_matches):
-        user_row = user_pool.iloc[idx]
+    top_rows = user_pool.iloc[[idx for idx, _ in top_matches]].to_dict('records')
+    for i, ((idx, score), user_row) in enumerate(zip(top_matches, top_rows)):
         name = user_row["real_name"] if "real_name" in user_row else f"User {idx+1}"
         nationality = user_row["nationality"] if "nationality" in user_row else "Unknown"
         age_group = user_row["age_group"] if "age_group" in user_row else "Unknown"
@@ -7,11 +7,15 @@ This script starts a simple HTTP server to serve the survey form and handle form
 import os
 import sys
 import json
-import pandas as pd
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+import csv
+import io
+import logging
+import functools
+import hmac
+from flask import Flask, Response, request, jsonify
 from datetime import datetime
 from dotenv import load_dotenv
+from backend.api_support import configure_app
 
 # Get the current script directory path
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -20,12 +24,16 @@ PARENT_DIR = os.path.dirname(SCRIPT_DIR)
 # Load environment variables from parent directory
 load_dotenv(os.path.join(PARENT_DIR, '.env'))
 
-# Create backend directory if it doesn't exist
-BACKEND_DIR = os.path.join(SCRIPT_DIR, "backend")
-os.makedirs(BACKEND_DIR, exist_ok=True)
-
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+PRODUCTION = configure_app(app, __name__)
+logger = logging.getLogger(__name__)
+
+# Token required by the survey export endpoint; the export is disabled while it's unset
+EXPORT_TOKEN = os.environ.get('SURVEY_EXPORT_TOKEN')
+
+# Submissions are saved next to the backend app (the directory ships with the repo, so
+# it isn't created here; submit() recreates it only if a write finds it missing)
+BACKEND_DIR = os.path.join(SCRIPT_DIR, "backend")
 
 # Fields for the survey form (all are optional, defaults will be used if empty)
 SURVEY_FIELDS = [
@@ -35,59 +43,78 @@ SURVEY_FIELDS = [
     'insurance_type', 'past_insurance_issues'
 ]
 
+# Default values used when a survey field is left empty
+SURVEY_DEFAULTS = {
+    'real_name': "Anonymous Traveler",
+    'age_group': "25–34",
+    'gender': "Prefer not to say",
+    'nationality': "International",
+    'preferred_residence': "Swiss",
+    'cultural_symbol': "Local cuisine",
+    'bucket_list': "Nature exploration",
+    'healthcare_expectations': "Basic healthcare access",
+    'travel_budget': "$1000",
+    'currency_preferences': "Credit card",
+    'insurance_type': "Medical only",
+    'past_insurance_issues': "None"
+}
+
+# Write buffer size for survey CSV files (bytes)
+SURVEY_WRITE_BUFFER = 1024 * 1024
+
+def write_survey_csv(output_file, data):
+    """Write one survey submission as a CSV file with a header row"""
+    # A buffer larger than any submission means the file is written with a single write() on close
+    with open(output_file, 'w', newline='', encoding='utf-8', buffering=SURVEY_WRITE_BUFFER) as f:
+        writer = csv.DictWriter(f, fieldnames=list(data.keys()), lineterminator=os.linesep)
+        writer.writeheader()
+        writer.writerow(data)
+
+def read_survey_row(file_path):
+    """Read the submission row of a survey CSV"""
+    # A submission is a header plus one row, so the csv module is enough (no pandas import or DataFrame)
+    with open(file_path, newline='', encoding='utf-8') as f:
+        return next(csv.DictReader(f), {})
+
+@functools.lru_cache(maxsize=8)
+def get_user_response_body(file_path, mtime_ns):
+    """Serialize the /api/get_user response for a survey file, cached per file version (path + modification time)"""
+    return app.json.dumps({'status': 'success', 'data': read_survey_row(file_path)}) + "\n"
+
+def find_latest_submission():
+    """Return the path of the newest user_answer_*.csv in BACKEND_DIR, or None if there are none"""
+    # Timestamped names sort chronologically, so a single scandir pass keeping the largest
+    # name finds the newest file without building or sorting a list of every submission
+    latest_name = latest_path = None
+    with os.scandir(BACKEND_DIR) as entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith("user_answer_") and name.endswith(".csv") and (latest_name is None or name > latest_name):
+                latest_name, latest_path = name, entry.path
+    return latest_path
+
 @app.route('/')
 def home():
     return 'WanderMatch Survey API is running!'
 
-@app.route('/api/submit', methods=['POST', 'OPTIONS'])
+# The survey page posts its answers here as JSON
+@app.route('/api/submit', methods=['POST'])
 def submit():
-    # Handle OPTIONS request for CORS preflight
-    if request.method == 'OPTIONS':
-        response = jsonify({'status': 'success'})
-        response.headers.add('Access-Control-Allow-Origin', '*')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-        response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
-        return response
-        
     try:
-        # Get the data from the request
-        data = request.json
+        # Get the data from the request (parsed once, not cached on the request;
+        # malformed or non-JSON bodies come back as None and get the 400 below)
+        data = request.get_json(cache=False, silent=True)
         if not data:
-            print("Error: No data provided in request")
+            logger.warning("Error: No data provided in request")
             return jsonify({'status': 'error', 'message': 'No data provided'}), 400
         
-        print(f"Received form data: {data}")
+        logger.debug("Received form data: %s", data)
         
         # Process all fields, filling in defaults when empty
         for field in SURVEY_FIELDS:
             if field not in data or not data[field]:
-                if field == 'real_name':
-                    data[field] = "Anonymous Traveler"
-                elif field == 'age_group':
-                    data[field] = "25–34"
-                elif field == 'gender':
-                    data[field] = "Prefer not to say"
-                elif field == 'nationality':
-                    data[field] = "International"
-                elif field == 'preferred_residence':
-                    data[field] = "Swiss"
-                elif field == 'cultural_symbol':
-                    data[field] = "Local cuisine"
-                elif field == 'bucket_list':
-                    data[field] = "Nature exploration"
-                elif field == 'healthcare_expectations':
-                    data[field] = "Basic healthcare access"
-                elif field == 'travel_budget':
-                    data[field] = "$1000"
-                elif field == 'currency_preferences':
-                    data[field] = "Credit card"
-                elif field == 'insurance_type':
-                    data[field] = "Medical only"
-                elif field == 'past_insurance_issues':
-                    data[field] = "None"
-                else:
-                    data[field] = "Not specified"
-                print(f"Filled missing field {field} with default value: {data[field]}")
+                data[field] = SURVEY_DEFAULTS.get(field, "Not specified")
+                logger.debug("Filled missing field %s with default value: %s", field, data[field])
         
         # Generate timestamp for the file
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
@@ -95,10 +122,14 @@ def submit():
         # Create a CSV file to store the data
         output_file = os.path.join(BACKEND_DIR, f"user_answer_{timestamp}.csv")
         
-        # Convert data to DataFrame and save as CSV
-        df = pd.DataFrame([data])
-        df.to_csv(output_file, index=False)
-        print(f"User data saved to {output_file}")
+        # Write the single submission straight to CSV (header + one row)
+        try:
+            write_survey_csv(output_file, data)
+        except FileNotFoundError:
+            # Only touch the directory when it's actually missing
+            os.makedirs(BACKEND_DIR, exist_ok=True)
+            write_survey_csv(output_file, data)
+        logger.debug("User data saved to %s", output_file)
         
         # Return success status
         return jsonify({
@@ -108,30 +139,75 @@ def submit():
         })
     
     except Exception as e:
-        print(f"Error processing form submission: {str(e)}")
+        logger.exception("Error processing form submission: %s", e)
         return jsonify({'status': 'error', 'message': f'Server error: {str(e)}'}), 500
 
 @app.route('/api/get_user', methods=['GET'])
 def get_user():
     try:
         # Get most recent user answer file from backend directory
-        files = [f for f in os.listdir(BACKEND_DIR) if f.startswith("user_answer_") and f.endswith(".csv")]
-        if not files:
+        file_path = find_latest_submission()
+        if file_path is None:
             return jsonify({'status': 'error', 'message': 'No user data found'}), 404
         
-        # Sort files by timestamp
-        latest_file = sorted(files)[-1]
-        file_path = os.path.join(BACKEND_DIR, latest_file)
-        
-        # Read the CSV file
-        df = pd.read_csv(file_path)
-        user_data = df.iloc[0].to_dict()
-        
-        return jsonify({'status': 'success', 'data': user_data})
+        # Read the CSV file and encode the response once per file version, so repeat
+        # requests skip both the CSV read and the JSON encoding
+        body = get_user_response_body(file_path, os.stat(file_path).st_mtime_ns)
+        return Response(body, mimetype=app.json.mimetype)
     
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/export', methods=['GET'])
+def export_surveys():
+    """Stream every saved survey submission as a single CSV download (admin only)"""
+    # Submissions hold personal and health answers, so only callers with the admin token may export
+    if not EXPORT_TOKEN:
+        return jsonify({'status': 'error', 'message': 'Export is disabled'}), 404
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not hmac.compare_digest(token.encode(), EXPORT_TOKEN.encode()):
+        return jsonify({'status': 'error', 'message': 'Unauthorized'}), 401
+    
+    try:
+        files = sorted(f for f in os.listdir(BACKEND_DIR) if f.startswith("user_answer_") and f.endswith(".csv"))
+        paths = [os.path.join(BACKEND_DIR, f) for f in files]
+        
+        # Union of the columns across submissions, read from each file's header row only
+        fieldnames = list(SURVEY_FIELDS)
+        for path in paths:
+            with open(path, newline='', encoding='utf-8', errors='replace') as f:
+                for name in next(csv.reader(f), []):
+                    if name not in fieldnames:
+                        fieldnames.append(name)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+    
+    def generate():
+        # Rows are copied file by file and flushed per file, so memory stays at one submission
+        buffer = io.StringIO()
+        # Cells beyond a file's header row (DictReader's None key) have no column to go in, so
+        # they're left out and reported rather than failing the download partway through
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames, lineterminator=os.linesep, extrasaction='ignore')
+        writer.writeheader()
+        for path in paths:
+            skipped = 0
+            with open(path, newline='', encoding='utf-8', errors='replace') as f:
+                for row in csv.DictReader(f):
+                    skipped += len(row.get(None, ()))
+                    writer.writerow(row)
+            if skipped:
+                logger.warning(f"Export skipped {skipped} cell(s) beyond the header row in {os.path.basename(path)}")
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    
+    return Response(
+        generate(),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=survey_export.csv'}
+    )
+
 @app.route('/api/destinations', methods=['GET'])
 def get_destinations():
     try:
@@ -142,4 +218,7 @@ def get_destinations():
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True) 
\ No newline at end of file
+    # The debug reloader runs the app in a second process that re-imports everything, so it's
+    # off in production. For multi-worker deployments prefer a preloading WSGI server, e.g.
+    #   gunicorn --preload --workers 2 --worker-class gthread --threads 8 --bind 0.0.0.0:5000 server:app
+    app.run(host='0.0.0.0', port=5000, debug=not PRODUCTION) 
\ No newline at end of file
@@ -16,6 +16,12 @@ from rich.markdown import Markdown
 from rich.prompt import Prompt, Confirm
 from typing import Dict, Any, Optional, Tuple, List
 
+# Prefer orjson for (de)serializing cached responses when it's installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Initialize console
 console = Console()
 
@@ -121,4 +127,46 @@ def save_embeddings_cache(pool_embedded_lists, user_pool_path, cache_dir):
             
         print_success(f"Saved embeddings for {len(pool_embedded_lists)} users to cache.")
     except Exception as e:
-        print_warning(f"Error saving embeddings cache: {str(e)}") 
\ No newline at end of file
+        print_warning(f"Error saving embeddings cache: {str(e)}") 
+
+
+def get_prompt_hash(prompt, kind):
+    """Content-address a generation request by its output type and prompt text."""
+    return hashlib.sha256(f"{kind}\n{prompt}".encode("utf-8")).hexdigest()
+
+def load_cached_response(prompt, kind, cache_dir, max_age=None):
+    """Load a cached generation result for an identical prompt if available.
+
+    Results saved more than max_age seconds ago are treated as missing.
+    """
+    cache_file = os.path.join(cache_dir, f"{get_prompt_hash(prompt, kind)}.json")
+    try:
+        saved_at = os.path.getmtime(cache_file)
+    except OSError:
+        return None
+    if max_age is not None and time.time() - saved_at > max_age:
+        return None
+    
+    try:
+        if orjson is not None:
+            with open(cache_file, "rb") as f:
+                return orjson.loads(f.read())
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print_warning(f"Error loading cached response: {str(e)}")
+        return None
+
+def save_cached_response(prompt, kind, result, cache_dir):
+    """Save a generation result so identical prompts can reuse it."""
+    cache_file = os.path.join(cache_dir, f"{get_prompt_hash(prompt, kind)}.json")
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        if orjson is not None:
+            with open(cache_file, "wb") as f:
+                f.write(orjson.dumps(result))
+        else:
+            with open(cache_file, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+    except Exception as e:
+        print_warning(f"Error saving cached response: {str(e)}")
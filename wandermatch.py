@@ -11,20 +11,34 @@ To run: python wandermatch.py
 """
 import os
 import sys
-import traceback
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import json
 import random
 import webbrowser
+import threading
 import csv
+import subprocess
 import re
+import string
 import time
+import functools
+import asyncio
+import atexit
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Prefer orjson for parsing API responses when it's installed
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 
 # Import local modules
 from utils import (
     print_header, print_info, print_success, 
-    print_error, print_warning, get_env_var
+    print_error, print_warning, get_env_var,
+    load_cached_response, save_cached_response
 )
 
 # Load environment variables
@@ -33,6 +47,53 @@ load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env'))
 # Constants
 WORKSPACE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Output locations, anchored at the project root (not the working directory) and resolved once
+OUTPUT_DIR = os.path.join(WORKSPACE_DIR, "wandermatch_output")
+BLOGS_DIR = os.path.join(OUTPUT_DIR, "blogs")
+MAPS_DIR = os.path.join(OUTPUT_DIR, "maps")
+
+# Survey and matching components, resolved once instead of per call
+GET_USER_INFO_DIR = os.path.join(WORKSPACE_DIR, "get_user_info")
+SURVEY_BACKEND_DIR = os.path.join(GET_USER_INFO_DIR, "backend")
+EMBED_INFO_PATH = os.path.join(GET_USER_INFO_DIR, "embed_info.py")
+
+# Content-addressed cache of generated results, keyed by prompt
+RESPONSE_CACHE_DIR = os.path.join(WORKSPACE_DIR, "cache", "responses")
+
+# Reuse generated blog posts for identical trips (set WANDERMATCH_BLOG_CACHE=0 to always regenerate)
+BLOG_CACHE_ENABLED = get_env_var("WANDERMATCH_BLOG_CACHE", "1") == "1"
+
+# Reuse generated transport options (set WANDERMATCH_TRANSPORT_CACHE=0 to always regenerate)
+TRANSPORT_CACHE_ENABLED = get_env_var("WANDERMATCH_TRANSPORT_CACHE", "1") == "1"
+
+# Cached generation results older than this many seconds are regenerated (default one week)
+RESPONSE_CACHE_MAX_AGE = float(get_env_var("WANDERMATCH_CACHE_MAX_AGE", str(7 * 24 * 60 * 60)))
+
+# Shared HTTP connection pool for outbound API calls, created on first use
+_HTTP_CLIENT = None
+
+# Shared OpenAI clients (one per API key), all backed by _HTTP_CLIENT
+_OPENAI_CLIENTS = {}
+
+# Shared Gemini models, one per API key, model name and generation config
+_GEMINI_MODELS = {}
+
+# Retries (with exponential backoff) on rate limits, timeouts and connection errors
+# before an OpenAI call gives up and we fall back to another provider or the template
+OPENAI_MAX_RETRIES = 3
+
+# Per-attempt timeout for LLM requests, enforced by the SDK clients themselves
+LLM_REQUEST_TIMEOUT = float(get_env_var("WANDERMATCH_LLM_TIMEOUT", "30"))
+
+# Total time the SDKs may spend on one call across all attempts and backoff
+LLM_RETRY_DEADLINE = LLM_REQUEST_TIMEOUT * (OPENAI_MAX_RETRIES + 1) + 10
+
+# Overall budget for one LLM provider's blog before treating it as stalled
+BLOG_PROVIDER_TIMEOUT = LLM_RETRY_DEADLINE + 5
+
+# Providers whose API key was rejected during this run; later steps skip them instead of re-failing
+_PROVIDER_STATUS = {"gemini": True, "openai": True}
+
 # Check required environment variables
 required_keys = [
     "PORTIA_API_KEY",
@@ -80,12 +141,9 @@ def main():
     # Generate blog post
     blog_result = generate_blog_post(user_info, partner_info, route_info)
     
-    # Create output directories
-    output_dir = os.path.join(WORKSPACE_DIR, "wandermatch_output")
-    blogs_dir = os.path.join(output_dir, "blogs")
-    maps_dir = os.path.join(output_dir, "maps")
-    for directory in [output_dir, blogs_dir, maps_dir]:
-        os.makedirs(directory, exist_ok=True)
+    # Create output directories (the same ones the blog and map writers use)
+    for directory in (OUTPUT_DIR, BLOGS_DIR, MAPS_DIR):
+        ensure_dir(directory)
     
     # Display summary
     print_header("Your WanderMatch Journey is Ready!", emoji="✨", color="green")
@@ -100,6 +158,9 @@ def main():
     
     print_info("\nThank you for using WanderMatch! Safe travels!")
 
+# How long (seconds) generated transport options are reused for the same city pair
+TRANSPORT_CACHE_TTL = 60 * 60
+
 def select_transport_mode(origin_city, destination_city):
     """
     Let the user select from available transport modes between cities.
@@ -115,61 +176,82 @@ def select_transport_mode(origin_city, destination_city):
     print_info(f"Finding the best ways to travel from {origin_city} to {destination_city}...")
     
     # Create output directory
-    output_dir = os.path.join("wandermatch_output", "maps")
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = MAPS_DIR
+    ensure_dir(output_dir)
     
     # Try to generate transport options with AI APIs
     transport_options = []
-    
-    # Check if we can use Gemini API
-    gemini_api_key = os.environ.get("GEMINI_API_KEY")
-    if gemini_api_key:
+
+    # Reuse recent options for the same city pair before starting any provider
+    cache_key = json.dumps([origin_city.strip().lower(), destination_city.strip().lower()])
+    cached = None
+    if TRANSPORT_CACHE_ENABLED:
+        cached = load_cached_response(cache_key, "transport_options", RESPONSE_CACHE_DIR, max_age=TRANSPORT_CACHE_TTL)
+    if cached:
+        transport_options = cached["options"]
+        print_success("Using recently generated transport options for this route.")
+
+    # Collect the providers we have keys for
+    providers = []
+    if not transport_options:
+        gemini_api_key = os.environ.get("GEMINI_API_KEY")
+        if gemini_api_key and provider_available("gemini"):
+            providers.append(("Gemini", generate_transport_options_with_gemini, gemini_api_key))
+        openai_api_key = os.environ.get("OPENAI_API_KEY")
+        if openai_api_key and provider_available("openai"):
+            providers.append(("OpenAI", generate_transport_options_with_openai, openai_api_key))
+
+    if len(providers) == 1:
+        # Only one provider configured, so there's nothing to race; call it directly
+        name, generate, api_key = providers[0]
+        print_info(f"Using {name} to generate transport options...")
         try:
-            print_info("Using Gemini to generate transport options...")
-            transport_options = generate_transport_options_with_gemini(origin_city, destination_city, gemini_api_key)
+            transport_options = generate(origin_city, destination_city, api_key)
             if transport_options:
-                print_success("Successfully generated transport options with Gemini.")
+                print_success(f"Successfully generated transport options with {name}.")
         except Exception as e:
-            print_warning(f"Error using Gemini API: {str(e)}")
-    
-    # If Gemini failed, try OpenAI
-    if not transport_options:
-        openai_api_key = os.environ.get("OPENAI_API_KEY")
-        if openai_api_key:
-            try:
-                print_info("Using OpenAI to generate transport options...")
-                transport_options = generate_transport_options_with_openai(origin_city, destination_city, openai_api_key)
-                if transport_options:
-                    print_success("Successfully generated transport options with OpenAI.")
-            except Exception as e:
-                print_warning(f"Error using OpenAI API: {str(e)}")
-    
+            print_warning(f"Error using {name} API: {str(e)}")
+    elif providers:
+        # Query the providers concurrently and keep the first usable answer
+        print_info(f"Using {' and '.join(name for name, _, _ in providers)} to generate transport options...")
+        executor = ThreadPoolExecutor(max_workers=len(providers))
+        futures = {
+            executor.submit(generate, origin_city, destination_city, api_key): name
+            for name, generate, api_key in providers
+        }
+        try:
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    options = future.result()
+                except Exception as e:
+                    print_warning(f"Error using {name} API: {str(e)}")
+                    continue
+                if options:
+                    transport_options = options
+                    print_success(f"Successfully generated transport options with {name}.")
+                    break
+        finally:
+            # Don't block on the slower provider once we have an answer
+            executor.shutdown(wait=False)
+
+    # Remember API results for this city pair; default options aren't cached
+    if providers and transport_options and TRANSPORT_CACHE_ENABLED:
+        save_cached_response(
+            cache_key,
+            "transport_options",
+            {"options": transport_options},
+            RESPONSE_CACHE_DIR
+        )
+
     # If all API-based methods failed, use default options
     if not transport_options:
         print_info("Using default transport options...")
         transport_options = get_transport_options(origin_city, destination_city)
     
-    # Generate HTML visualization
-    try:
-        html_output = generate_transport_html(origin_city, destination_city, transport_options)
-        html_path = os.path.join(output_dir, "transport_options.html")
-        
-        # Create output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Write the HTML file
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(html_output)
-        
-        # Try to open the HTML file in a browser
-        try:
-            webbrowser.open('file://' + os.path.abspath(html_path))
-            print_success(f"Transport options visualization opened in your browser")
-        except Exception as e:
-            print_warning(f"Could not open browser: {str(e)}")
-            print_info(f"Transport options HTML saved to: {html_path}")
-    except Exception as e:
-        print_warning(f"Error generating transport visualization: {str(e)}")
+    # Generate HTML visualization (a small file, so it's written before the console table renders)
+    html_path = os.path.join(output_dir, "transport_options.html")
+    write_transport_html(html_path, origin_city, destination_city, transport_options)
     
     # Display transport options in a visually appealing way
     try:
@@ -257,16 +339,25 @@ def select_transport_mode(origin_city, destination_city):
         except ValueError:
             print_warning("Please enter a valid number")
 
+def write_transport_html(html_path, origin_city, destination_city, transport_options):
+    """Write the transport options page to disk and open it in the browser"""
+    try:
+        # Create output directory if it doesn't exist
+        ensure_dir(os.path.dirname(html_path))
+        
+        # Stream the HTML file to disk as each card is rendered
+        with open(html_path, "w", encoding="utf-8") as f:
+            f.writelines(iter_transport_html(origin_city, destination_city, transport_options))
+        
+        print_info(f"Opening transport options visualization in your browser: {html_path}")
+        open_in_browser(html_path)
+    except Exception as e:
+        print_warning(f"Error generating transport visualization: {str(e)}")
+
 def generate_transport_options_with_gemini(origin_city, destination_city, api_key):
     """Generate transport options using Google Gemini API"""
-    import google.generativeai as genai
-    import json
-    
     print_info("Generating comprehensive transport options with Gemini...")
     
-    # Configure the API
-    genai.configure(api_key=api_key)
-    
     # Set up the model
     generation_config = {
         "temperature": 0.9,
@@ -275,10 +366,8 @@ def generate_transport_options_with_gemini(origin_city, destination_city, api_ke
         "max_output_tokens": 8192,
     }
     
-    model = genai.GenerativeModel(
-        model_name="gemini-1.5-pro",
-        generation_config=generation_config
-    )
+    # Reuse the model built for this key and settings, if any
+    model = get_gemini_model(api_key, "gemini-1.5-pro", generation_config)
     
     prompt = f"""
     Generate detailed and accurate transportation options for a journey from {origin_city} to {destination_city}.
@@ -330,57 +419,204 @@ def generate_transport_options_with_gemini(origin_city, destination_city, api_ke
     """
     
     try:
-        # Generate content
-        response = model.generate_content(prompt)
-        response_text = response.text
-        
-        # Extract JSON part
-        if "```json" in response_text:
-            json_start = response_text.find("```json") + 7
-            json_end = response_text.find("```", json_start)
-            response_text = response_text[json_start:json_end].strip()
-        elif "```" in response_text:
-            json_start = response_text.find("```") + 3
-            json_end = response_text.find("```", json_start)
-            response_text = response_text[json_start:json_end].strip()
-        
-        # Try to fix common JSON formatting issues
-        response_text = response_text.replace("'", "\"")
-        
-        # Try to parse JSON directly
-        try:
-            transport_data = json.loads(response_text)
-        except json.JSONDecodeError:
-            # If parsing fails, attempt additional cleaning
-            import re
+        # Stream the response, stopping as soon as a complete JSON value has arrived
+        response = model.generate_content(prompt, stream=True, request_options=gemini_request_options())
+        transport_data, response_text = stream_json_response(response, lambda chunk: chunk.text)
+        
+        if transport_data is None:
+            # Extract JSON part
+            if "```json" in response_text:
+                json_start = response_text.find("```json") + 7
+                json_end = response_text.find("```", json_start)
+                response_text = response_text[json_start:json_end].strip()
+            elif "```" in response_text:
+                json_start = response_text.find("```") + 3
+                json_end = response_text.find("```", json_start)
+                response_text = response_text[json_start:json_end].strip()
+        
+            # Try to parse JSON directly
+            try:
+                transport_data = decode_embedded_json(response_text)
+            except json.JSONDecodeError:
+                # If parsing fails, attempt additional cleaning
+                # Fix common JSON formatting issues
+                response_text = response_text.replace("'", "\"")
             
-            # Fix trailing commas in arrays and objects
-            response_text = re.sub(r',\s*]', ']', response_text)
-            response_text = re.sub(r',\s*}', '}', response_text)
+                # Fix trailing commas in arrays and objects
+                response_text = re.sub(r',\s*]', ']', response_text)
+                response_text = re.sub(r',\s*}', '}', response_text)
             
-            # Fix missing quotes around property names
-            response_text = re.sub(r'([{,]\s*)(\w+)(\s*:)', r'\1"\2"\3', response_text)
+                # Fix missing quotes around property names
+                response_text = re.sub(r'([{,]\s*)(\w+)(\s*:)', r'\1"\2"\3', response_text)
             
-            # Ensure numeric values don't have quotes
-            response_text = re.sub(r'"(\d+)"', r'\1', response_text)
+                # Ensure numeric values don't have quotes
+                response_text = re.sub(r'"(\d+)"', r'\1', response_text)
             
-            # Try parsing again after fixes
-            transport_data = json.loads(response_text)
+                # Try parsing again after fixes
+                transport_data = _json_loads(response_text)
         
-        return transport_data.get("options", [])
+        transport_options = transport_data.get("options", [])
+        return transport_options
     except Exception as e:
         print_warning(f"Error in Gemini transport options generation: {str(e)}")
+        record_provider_error("gemini", e)
         # Return empty list to trigger fallback
         return []
 
+# Shared decoder for pulling the first JSON value out of surrounding text
+_JSON_DECODER = json.JSONDecoder()
+
+def find_embedded_json(text, expected_type=dict, partial=False):
+    """Return the first JSON value of expected_type (dict or list) in text, skipping brackets in prose, or None
+
+    With partial=True (text still streaming in), None is also returned as soon as a candidate is
+    merely incomplete, since it may still turn out to be the value.
+    """
+    opener = "{" if expected_type is dict else "["
+    pos = text.find(opener)
+    while pos != -1:
+        try:
+            value, end = _JSON_DECODER.raw_decode(text, pos)
+        except json.JSONDecodeError as e:
+            if partial and (e.pos >= len(text) or e.msg.startswith("Unterminated")):
+                return None
+            # Resume after the part that did parse, so values nested in a malformed one aren't picked up
+            pos = text.find(opener, max(e.pos, pos + 1))
+            continue
+        if isinstance(value, expected_type):
+            return value
+        pos = text.find(opener, end)
+    return None
+
+def decode_embedded_json(text, expected_type=dict):
+    """Parse text as a JSON value of expected_type, or failing that find one in it, ignoring prose around it"""
+    try:
+        value = _json_loads(text)
+        if isinstance(value, expected_type):
+            return value
+    except json.JSONDecodeError:
+        pass
+    value = find_embedded_json(text, expected_type)
+    if value is None:
+        raise json.JSONDecodeError(f"No JSON {expected_type.__name__} found", text, 0)
+    return value
+
+def stream_json_response(chunks, chunk_text, expected_type=dict):
+    """Read a streamed response until it holds a complete JSON value of expected_type, returning (value, text); value is None if it never does"""
+    buffer = ""
+    for chunk in chunks:
+        text = chunk_text(chunk)
+        buffer += text
+        # A value can only have just completed if this chunk closed a bracket
+        if "}" not in text and "]" not in text:
+            continue
+        value = find_embedded_json(buffer, expected_type, partial=True)
+        if value is None:
+            continue
+        # Drop the rest of the stream (closing code fences, trailing commentary)
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+        return value, buffer
+    return None, buffer
+
+def openai_chunk_text(chunk):
+    """Return the text delta carried by a streamed OpenAI chat completion chunk"""
+    if chunk.choices:
+        return chunk.choices[0].delta.content or ""
+    return ""
+
+def provider_available(provider):
+    """Check whether a provider's key has not been rejected earlier in this run"""
+    return _PROVIDER_STATUS.get(provider, True)
+
+def record_provider_error(provider, error):
+    """Remember a provider as unavailable if the error means its API key is invalid"""
+    auth_errors = ("AuthenticationError", "PermissionDeniedError", "PermissionDenied", "Unauthenticated")
+    if type(error).__name__ in auth_errors or "API key not valid" in str(error):
+        if _PROVIDER_STATUS.get(provider, True):
+            print_warning(f"{provider.capitalize()} rejected its API key; skipping it for the rest of this session.")
+        _PROVIDER_STATUS[provider] = False
+
+def refresh_provider_status():
+    """Forget earlier key failures, e.g. after the API keys have been updated"""
+    for provider in _PROVIDER_STATUS:
+        _PROVIDER_STATUS[provider] = True
+
+def get_http_client():
+    """Return the process-wide httpx client, creating it on first use"""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        import httpx
+        
+        # Keep TLS connections alive between back-to-back calls to the same host
+        _HTTP_CLIENT = httpx.Client(
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        )
+        atexit.register(_HTTP_CLIENT.close)
+    return _HTTP_CLIENT
+
+def gemini_request_options(is_async=False):
+    """Request options giving a Gemini call the SDK's own per-attempt timeout and retries, like the OpenAI client"""
+    from google.api_core import exceptions, retry, retry_async
+    
+    # Retry timeouts, rate limits and transient server errors with exponential backoff
+    retry_class = retry_async.AsyncRetry if is_async else retry.Retry
+    return {
+        "timeout": LLM_REQUEST_TIMEOUT,
+        "retry": retry_class(
+            predicate=retry.if_exception_type(
+                exceptions.DeadlineExceeded,
+                exceptions.TooManyRequests,
+                exceptions.InternalServerError,
+                exceptions.ServiceUnavailable,
+            ),
+            initial=1.0,
+            multiplier=2.0,
+            maximum=8.0,
+            timeout=LLM_RETRY_DEADLINE,
+        ),
+    }
+
+def get_openai_client(api_key):
+    """Return the shared OpenAI client for an API key, creating it on first use"""
+    client = _OPENAI_CLIENTS.get(api_key)
+    if client is None:
+        from openai import OpenAI
+        
+        client = OpenAI(
+            api_key=api_key,
+            http_client=get_http_client(),
+            timeout=LLM_REQUEST_TIMEOUT,
+            max_retries=OPENAI_MAX_RETRIES
+        )
+        _OPENAI_CLIENTS[api_key] = client
+    return client
+
+@functools.lru_cache(maxsize=1)
+def get_gemini_client(api_key):
+    """Configure the Gemini SDK on first use and return the module (reconfigures only if the key changes)"""
+    import google.generativeai as genai
+    
+    genai.configure(api_key=api_key)
+    return genai
+
+def get_gemini_model(api_key, model_name, generation_config):
+    """Return the shared Gemini model for a key, model name and generation config, creating it on first use"""
+    cache_key = (api_key, model_name, tuple(sorted(generation_config.items())))
+    model = _GEMINI_MODELS.get(cache_key)
+    if model is None:
+        genai = get_gemini_client(api_key)
+        model = genai.GenerativeModel(model_name=model_name, generation_config=generation_config)
+        _GEMINI_MODELS[cache_key] = model
+    return model
+
 def generate_transport_options_with_openai(origin_city, destination_city, api_key):
     """Generate transport options using OpenAI API"""
-    from openai import OpenAI
-    
     print_info("Generating comprehensive transport options with OpenAI...")
     
-    # Initialize OpenAI client
-    client = OpenAI(api_key=api_key)
+    # Reuse the shared OpenAI client
+    client = get_openai_client(api_key)
     
     # Create prompt for transport options
     prompt = f"""
@@ -448,29 +684,37 @@ def generate_transport_options_with_openai(origin_city, destination_city, api_ke
     """
     
     try:
-        # Generate response
-        response = client.chat.completions.create(
+        # Stream the response, closing it as soon as a complete JSON object has arrived
+        stream = client.chat.completions.create(
             model="gpt-3.5-turbo",
             response_format={"type": "json_object"},
             messages=[
                 {"role": "system", "content": "You are a travel logistics expert providing accurate, detailed transportation information in JSON format."},
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            stream=True
         )
+        transport_data, response_text = stream_json_response(stream, openai_chunk_text)
         
         # Parse JSON response
-        import json
-        transport_data = json.loads(response.choices[0].message.content)
+        if transport_data is None:
+            transport_data = _json_loads(response_text)
         
-        return transport_data.get("options", [])
+        transport_options = transport_data.get("options", [])
+        return transport_options
     except Exception as e:
         print_warning(f"Error in OpenAI transport options generation: {str(e)}")
+        record_provider_error("openai", e)
         # Return empty list to trigger fallback
         return []
 
 def generate_transport_html(origin_city, destination_city, transport_options):
     """Generate an HTML file with transport options"""
-    html = f"""
+    return "".join(iter_transport_html(origin_city, destination_city, transport_options))
+
+def iter_transport_html(origin_city, destination_city, transport_options):
+    """Yield the transport options HTML fragment by fragment, so it can be streamed to disk"""
+    yield f"""
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -691,7 +935,7 @@ def generate_transport_html(origin_city, destination_city, transport_options):
     # Add cards for each transport option
     for option in transport_options:
         # Get transport mode icon
-        icon = get_transport_icon(option.get('mode', 'Other').lower())
+        icon = get_transport_icon(option.get('mode', 'Other'))
         
         # Determine carbon impact class
         carbon_impact = option.get('carbon_footprint', '').lower()
@@ -739,7 +983,7 @@ def generate_transport_html(origin_city, destination_city, transport_options):
         cons = option.get('cons', [])
         
         # Create card HTML
-        html += f"""
+        yield f"""
             <div class="transport-card">
                 <div class="card-header">
                     <div class="transport-icon">{icon}</div>
@@ -790,12 +1034,12 @@ def generate_transport_html(origin_city, destination_city, transport_options):
         
         # Add pros
         for pro in pros:
-            html += f"<li>{pro}</li>"
+            yield f"<li>{pro}</li>"
         
         if not pros:
-            html += "<li>Information not available</li>"
+            yield "<li>Information not available</li>"
         
-        html += """
+        yield """
                         </ul>
                     </div>
                     <div class="cons-list">
@@ -805,12 +1049,12 @@ def generate_transport_html(origin_city, destination_city, transport_options):
         
         # Add cons
         for con in cons:
-            html += f"<li>{con}</li>"
+            yield f"<li>{con}</li>"
         
         if not cons:
-            html += "<li>Information not available</li>"
+            yield "<li>Information not available</li>"
         
-        html += """
+        yield """
                         </ul>
                     </div>
                 </div>
@@ -818,18 +1062,18 @@ def generate_transport_html(origin_city, destination_city, transport_options):
         
         # Add unique features if available
         if option.get('unique_features'):
-            html += f"""
+            yield f"""
                 <div class="unique-features">
                     <strong>Unique Features:</strong> {option.get('unique_features')}
                 </div>
             """
         
-        html += """
+        yield """
             </div>
         """
     
     # Complete the HTML
-    html += """
+    yield """
             </div>
             <footer>
                 <p>Generated by WanderMatch &copy; 2023 | Transport options are estimates and subject to change</p>
@@ -838,122 +1082,68 @@ def generate_transport_html(origin_city, destination_city, transport_options):
     </body>
     </html>
     """
-    
-    return html
 
-def generate_travel_route(user_info, partner_info, transport_option):
-    """Generate a travel route using Gemini or OpenAI API"""
-    print_header("Travel Route Generation")
-    
-    # Get time period from user
-    print_info("How many days would you like to travel?")
-    
-    try:
-        trip_days = int(input_prompt("Enter number of days (1-30): "))
-        if trip_days < 1 or trip_days > 30:
-            print_warning("Invalid number of days. Setting to default of 7 days.")
-            trip_days = 7
-    except ValueError:
-        print_warning("Invalid input. Setting to default of 7 days.")
-        trip_days = 7
-    
-    # Set default start and end dates automatically without asking the user
-    start_date = datetime.now() + timedelta(days=10)  # Default start in 10 days
-    start_date_str = start_date.strftime('%Y-%m-%d')
-    end_date = start_date + timedelta(days=trip_days)
-    end_date_str = end_date.strftime('%Y-%m-%d')
-    
-    try:
-        # Extract origin and destination from user info and transport option
-        origin_city = user_info.get('origin_city', transport_option.get('origin', 'London'))
-        destination_city = user_info.get('destination_city', transport_option.get('destination', 'Paris'))
-        
-        # Generate route information using Gemini API if available
-        try:
-            # Try with Gemini first
-            gemini_api_key = os.environ.get("GEMINI_API_KEY")
-            if gemini_api_key:
-                import google.generativeai as genai
-                import json
-                import re
+# Itinerary prompt for Gemini; string.Template keeps the JSON example free of brace escaping
+TRAVEL_ROUTE_PROMPT = string.Template("""
+                Generate a detailed travel itinerary for a $trip_days-day trip from $origin_city to $destination_city.
+                The trip starts on $start_date and ends on $end_date.
                 
-                # Configure Gemini API
-                genai.configure(api_key=gemini_api_key)
+                The traveler is $traveler_name who likes $traveler_interests.
                 
-                # Set up the model with appropriate parameters
-                generation_config = {
-                    "temperature": 0.7,
-                    "top_p": 1,
-                    "top_k": 1,
-                    "max_output_tokens": 8192,
-                }
+                $companion_line
                 
-                model = genai.GenerativeModel(
-                    model_name="gemini-1.5-pro",
-                    generation_config=generation_config
-                )
-                
-                # Create a detailed travel prompt
-                travel_prompt = f"""
-                Generate a detailed travel itinerary for a {trip_days}-day trip from {origin_city} to {destination_city}.
-                The trip starts on {start_date_str} and ends on {end_date_str}.
-                
-                The traveler is {user_info.get('name', 'A traveler')} who likes {user_info.get('interests', ['exploring', 'food', 'culture'])}.
-                
-                {f"They'll be traveling with {partner_info.get('name', 'a partner')} who likes {', '.join(partner_info.get('interests', ['sightseeing', 'relaxing']))}." if partner_info else "They'll be traveling solo."}
-                
-                The chosen transportation mode is {transport_option.get('mode', 'Unknown')} which takes {transport_option.get('duration', 'some time')} and costs approximately {transport_option.get('cost', 'Unknown')}.
+                The chosen transportation mode is $transport_mode which takes $transport_duration and costs approximately $transport_cost.
                 
                 Please structure the response as a JSON object with the following format:
                 
-                {{
-                  "trip_summary": {{
-                    "origin": "{origin_city}",
-                    "destination": "{destination_city}",
-                    "duration": {trip_days},
-                    "transportation": "{transport_option.get('mode', 'Unknown')}",
-                    "start_date": "{start_date_str}",
-                    "end_date": "{end_date_str}"
-                  }},
+                {
+                  "trip_summary": {
+                    "origin": "$origin_city",
+                    "destination": "$destination_city",
+                    "duration": $trip_days,
+                    "transportation": "$transport_mode",
+                    "start_date": "$start_date",
+                    "end_date": "$end_date"
+                  },
                   "daily_plan": [
-                    {{
+                    {
                       "day": 1,
-                      "date": "{start_date_str}",
+                      "date": "$start_date",
                       "activities": [
-                        {{
+                        {
                           "time": "Morning",
                           "description": "detailed activity",
                           "location": "specific place",
                           "cost": "estimated cost"
-                        }},
-                        {{
+                        },
+                        {
                           "time": "Afternoon",
                           "description": "detailed activity",
                           "location": "specific place",
                           "cost": "estimated cost"
-                        }},
-                        {{
+                        },
+                        {
                           "time": "Evening",
                           "description": "detailed activity",
                           "location": "specific place",
                           "cost": "estimated cost"
-                        }}
+                        }
                       ],
-                      "accommodation": {{
+                      "accommodation": {
                         "name": "Hotel/Accommodation name",
                         "type": "type of accommodation",
                         "cost": "estimated cost"
-                      }}
-                    }}
+                      }
+                    }
                   ],
-                  "budget_breakdown": {{
+                  "budget_breakdown": {
                     "accommodation": "total accommodation cost",
                     "transportation": "total transportation cost",
                     "activities": "total activities cost",
                     "food": "estimated food cost",
                     "misc": "miscellaneous costs",
                     "total": "total trip cost"
-                  }},
+                  },
                   "packing_recommendations": [
                     "item 1",
                     "item 2"
@@ -962,20 +1152,86 @@ def generate_travel_route(user_info, partner_info, transport_option):
                     "tip 1",
                     "tip 2"
                   ]
-                }}
+                }
                 
                 Make the itinerary realistic, with accurate timing and appropriate activities for each day.
-                Suggest actual attractions, restaurants, and accommodations that exist in {destination_city}.
+                Suggest actual attractions, restaurants, and accommodations that exist in $destination_city.
                 Consider the travelers' preferences and budget in all recommendations.
                 
                 The response MUST be a VALID JSON object that can be parsed with json.loads().
                 DO NOT include any explanations, comments, or text outside the JSON structure.
                 DO NOT use placeholders like "// Repeat for each day" in the response.
-                """
+                """)
+
+def generate_travel_route(user_info, partner_info, transport_option):
+    """Generate a travel route using Gemini or OpenAI API"""
+    print_header("Travel Route Generation")
+    
+    # Get time period from user
+    print_info("How many days would you like to travel?")
+    
+    try:
+        trip_days = int(input_prompt("Enter number of days (1-30): "))
+        if trip_days < 1 or trip_days > 30:
+            print_warning("Invalid number of days. Setting to default of 7 days.")
+            trip_days = 7
+    except ValueError:
+        print_warning("Invalid input. Setting to default of 7 days.")
+        trip_days = 7
+    
+    # Set default start and end dates automatically without asking the user
+    start_date = datetime.now() + timedelta(days=10)  # Default start in 10 days
+    start_date_str = start_date.strftime('%Y-%m-%d')
+    end_date = start_date + timedelta(days=trip_days)
+    end_date_str = end_date.strftime('%Y-%m-%d')
+    
+    try:
+        # Extract origin and destination from user info and transport option
+        origin_city = user_info.get('origin_city', transport_option.get('origin', 'London'))
+        destination_city = user_info.get('destination_city', transport_option.get('destination', 'Paris'))
+        
+        # Generate route information using Gemini API if available
+        try:
+            # Try with Gemini first
+            gemini_api_key = os.environ.get("GEMINI_API_KEY")
+            if gemini_api_key and provider_available("gemini"):
+                # Set up the model with appropriate parameters
+                generation_config = {
+                    "temperature": 0.7,
+                    "top_p": 1,
+                    "top_k": 1,
+                    "max_output_tokens": 8192,
+                }
                 
-                # Get response from Gemini
-                response = model.generate_content(travel_prompt)
-                response_text = response.text
+                # Reuse the model built for this key and settings, if any
+                model = get_gemini_model(gemini_api_key, "gemini-1.5-pro", generation_config)
+                
+                # Create a detailed travel prompt
+                travel_prompt = TRAVEL_ROUTE_PROMPT.substitute(
+                    trip_days=trip_days,
+                    origin_city=origin_city,
+                    destination_city=destination_city,
+                    start_date=start_date_str,
+                    end_date=end_date_str,
+                    traveler_name=user_info.get('name', 'A traveler'),
+                    traveler_interests=user_info.get('interests', ['exploring', 'food', 'culture']),
+                    companion_line=(
+                        f"They'll be traveling with {partner_info.get('name', 'a partner')} who likes {', '.join(partner_info.get('interests', ['sightseeing', 'relaxing']))}."
+                        if partner_info else "They'll be traveling solo."
+                    ),
+                    transport_mode=transport_option.get('mode', 'Unknown'),
+                    transport_duration=transport_option.get('duration', 'some time'),
+                    transport_cost=transport_option.get('cost', 'Unknown')
+                )
+                
+                # Stream the response from Gemini, stopping as soon as a complete JSON value has arrived
+                response = model.generate_content(
+                    travel_prompt, stream=True, request_options=gemini_request_options()
+                )
+                route_data, response_text = stream_json_response(response, lambda chunk: chunk.text)
+                if route_data is not None:
+                    print_success("Successfully generated travel route with Gemini.")
+                    return route_data
                 
                 # Extract JSON if it's embedded in code blocks
                 if "```json" in response_text:
@@ -990,6 +1246,14 @@ def generate_travel_route(user_info, partner_info, transport_option):
                 # Clean the response text
                 response_text = response_text.strip()
                 
+                # Most responses are already valid JSON, so try that before running any repairs
+                try:
+                    route_data = decode_embedded_json(response_text)
+                    print_success("Successfully generated travel route with Gemini.")
+                    return route_data
+                except json.JSONDecodeError:
+                    pass
+                
                 # Replace comments (like // Repeat for each day) with empty string
                 response_text = re.sub(r'//.*\n', '\n', response_text)
                 
@@ -1008,7 +1272,7 @@ def generate_travel_route(user_info, partner_info, transport_option):
                 
                 # Try to parse the JSON
                 try:
-                    route_data = json.loads(response_text)
+                    route_data = _json_loads(response_text)
                     print_success("Successfully generated travel route with Gemini.")
                     return route_data
                 except json.JSONDecodeError as e:
@@ -1017,13 +1281,12 @@ def generate_travel_route(user_info, partner_info, transport_option):
                     # More aggressive JSON repair attempt
                     try:
                         # Try to find and extract just the most complete JSON object
-                        import re
                         json_pattern = re.compile(r'{.*}', re.DOTALL)
                         match = json_pattern.search(response_text)
                         if match:
                             potential_json = match.group(0)
                             # Try parsing the extracted JSON
-                            route_data = json.loads(potential_json)
+                            route_data = _json_loads(potential_json)
                             print_success("Successfully extracted and parsed partial JSON.")
                             return route_data
                     except:
@@ -1044,6 +1307,7 @@ def generate_travel_route(user_info, partner_info, transport_option):
                 
         except Exception as e:
             print_error(f"Error generating travel route: {str(e)}")
+            record_provider_error("gemini", e)
             # Fallback to simple route generation
             route_info = fallback_route_generation(user_info, partner_info, transport_option, 
                                                    origin_city, destination_city, trip_days, 
@@ -1071,7 +1335,6 @@ def fallback_route_generation(user_info, partner_info, transport_option,
         cost_string = str(cost_string).replace('$', '').replace('€', '').replace('£', '').replace(',', '')
         
         # Extract just the numeric part
-        import re
         numeric_match = re.search(r'\d+', cost_string)
         if numeric_match:
             try:
@@ -1263,7 +1526,7 @@ def generate_route_map(origin_city, destination_city, transport_option, route_in
     Generate an HTML file with a map showing the route using Leaflet and OpenStreetMap
     instead of Google Maps (no API key required)
     """
-    os.makedirs(maps_dir, exist_ok=True)
+    ensure_dir(maps_dir)
     map_file = os.path.join(maps_dir, "route_map.html")
     
     # Get coordinates
@@ -1551,47 +1814,66 @@ def generate_route_map(origin_city, destination_city, transport_option, route_in
     </html>
     """
     
-    # Write the HTML file
-    with open(map_file, "w") as f:
-        f.write(html)
+    # Write the HTML file as pre-encoded UTF-8 bytes
+    html_bytes = html.encode("utf-8")
+    with open(map_file, "wb", buffering=1024 * 1024) as f:
+        f.write(html_bytes)
     
     print_success(f"Route map generated: {map_file}")
     
     # Try to open the HTML file in a browser
     try:
-        webbrowser.open(f"file://{os.path.abspath(map_file)}")
+        open_in_browser(map_file)
     except Exception as e:
         print_warning(f"Could not open map in browser: {str(e)}")
     
     return map_file
 
+def open_in_browser(path):
+    """Open a local file in the default browser on a background thread so the caller doesn't wait"""
+    def _open():
+        try:
+            webbrowser.open(file_url(path))
+        except Exception as e:
+            print_warning(f"Could not open {path} in browser: {str(e)}")
+    
+    # Non-daemon so the browser still launches if the program is about to exit
+    threading.Thread(target=_open).start()
+
+def file_url(path):
+    """Build a file:// URL for a local path, skipping abspath for absolute paths"""
+    if not os.path.isabs(path):
+        path = os.path.abspath(path)
+    return "file://" + path.replace(os.sep, "/")
+
+# Approximate coordinates for common cities, keyed by lowercase name
+CITY_COORDINATES = {
+    'london': (51.5074, -0.1278),
+    'paris': (48.8566, 2.3522),
+    'rome': (41.9028, 12.4964),
+    'berlin': (52.5200, 13.4050),
+    'madrid': (40.4168, -3.7038),
+    'amsterdam': (52.3676, 4.9041),
+    'brussels': (50.8503, 4.3517),
+    'vienna': (48.2082, 16.3738),
+    'zurich': (47.3769, 8.5417),
+    'geneva': (46.2044, 6.1432),
+    'new york': (40.7128, -74.0060),
+    'washington': (38.9072, -77.0369),
+    'los angeles': (34.0522, -118.2437),
+    'chicago': (41.8781, -87.6298),
+    'tokyo': (35.6762, 139.6503),
+    'beijing': (39.9042, 116.4074),
+    'delhi': (28.6139, 77.2090),
+    'sydney': (33.8688, 151.2093),
+    'rio de janeiro': (-22.9068, -43.1729),
+    'cape town': (-33.9249, 18.4241)
+}
+
 def get_city_coordinates(city_name):
     """Get approximate coordinates for common cities"""
-    city_coords = {
-        'london': (51.5074, -0.1278),
-        'paris': (48.8566, 2.3522),
-        'rome': (41.9028, 12.4964),
-        'berlin': (52.5200, 13.4050),
-        'madrid': (40.4168, -3.7038),
-        'amsterdam': (52.3676, 4.9041),
-        'brussels': (50.8503, 4.3517),
-        'vienna': (48.2082, 16.3738),
-        'zurich': (47.3769, 8.5417),
-        'geneva': (46.2044, 6.1432),
-        'new york': (40.7128, -74.0060),
-        'washington': (38.9072, -77.0369),
-        'los angeles': (34.0522, -118.2437),
-        'chicago': (41.8781, -87.6298),
-        'tokyo': (35.6762, 139.6503),
-        'beijing': (39.9042, 116.4074),
-        'delhi': (28.6139, 77.2090),
-        'sydney': (33.8688, 151.2093),
-        'rio de janeiro': (-22.9068, -43.1729),
-        'cape town': (-33.9249, 18.4241)
-    }
-    
     # Default to London if city not found
-    return city_coords.get(city_name.lower(), (51.5074, -0.1278))
+    return CITY_COORDINATES.get(city_name.lower(), (51.5074, -0.1278))
 
 def get_transport_icon(transport_mode):
     """Get appropriate icon for transport mode"""
@@ -1627,7 +1909,15 @@ def render_budget_breakdown(route_info):
                     (isinstance(cost, str) and cost.replace('$', '').replace(',', '').isdigit())])
         budget['total'] = f"${total}"
     
-    html = """
+    # Build each budget item row, then assemble the table in one pass
+    rows = "".join(f"""
+                    <tr>
+                        <td style="padding: 12px; text-align: left; border-bottom: 1px solid #e5e7eb;">{item.replace('_', ' ').title()}</td>
+                        <td style="padding: 12px; text-align: right; border-bottom: 1px solid #e5e7eb;">{cost}</td>
+                    </tr>
+            """ for item, cost in budget.items() if item.lower() != 'total')
+    
+    html = f"""
     <div class="trip-details">
         <h2>Budget Breakdown</h2>
         <div class="budget-container">
@@ -1639,21 +1929,7 @@ def render_budget_breakdown(route_info):
                     </tr>
                 </thead>
                 <tbody>
-    """
-    
-    # Add each budget item
-    for item, cost in budget.items():
-        if item.lower() != 'total':
-            item_name = item.replace('_', ' ').title()
-            html += f"""
-                    <tr>
-                        <td style="padding: 12px; text-align: left; border-bottom: 1px solid #e5e7eb;">{item_name}</td>
-                        <td style="padding: 12px; text-align: right; border-bottom: 1px solid #e5e7eb;">{cost}</td>
-                    </tr>
-            """
-    
-    # Add total row
-    html += f"""
+    {rows}
                     <tr style="background-color: #f5f7fa; font-weight: bold;">
                         <td style="padding: 12px; text-align: left; border-bottom: 1px solid #e5e7eb;">Total</td>
                         <td style="padding: 12px; text-align: right; border-bottom: 1px solid #e5e7eb;">{budget.get('total', 'Not specified')}</td>
@@ -1666,8 +1942,13 @@ def render_budget_breakdown(route_info):
     
     return html
 
-def generate_blog_post(user_info, partner_info, route_info):
-    """Generate a travel blog post based on user information and travel route"""
+def generate_blog_post(user_info, partner_info, route_info, formats=("md", "html"), open_browser=True):
+    """
+    Generate a travel blog post based on user information and travel route
+    
+    Only the requested output formats ("md", "html") are rendered and saved;
+    the HTML version is opened in the browser unless open_browser is False.
+    """
     print_header("Blog Post Generation")
     
     # Create default route_info if it's None
@@ -1729,34 +2010,39 @@ def generate_blog_post(user_info, partner_info, route_info):
         print_info("Created default route information for blog generation")
     
     # Create output directory
-    output_dir = os.path.join("wandermatch_output", "blogs")
-    os.makedirs(output_dir, exist_ok=True)
+    output_dir = BLOGS_DIR
+    ensure_dir(output_dir)
     
     # Try to generate blog with OpenAI or Gemini
     blog_content = None
     
-    # Try with Gemini
-    gemini_api_key = get_env_var("GEMINI_API_KEY")
-    if gemini_api_key:
-        try:
-            print_info("Generating blog post with Gemini...")
-            blog_content = generate_blog_with_gemini(user_info, partner_info, route_info, gemini_api_key)
+    # Check for a blog already generated from the same trip details
+    cache_key = blog_cache_key(user_info, partner_info, route_info)
+    slots = blog_prompt_slots(user_info, partner_info, route_info)
+    if BLOG_CACHE_ENABLED:
+        blog_content = load_cached_response(cache_key, "blog_post", RESPONSE_CACHE_DIR, max_age=RESPONSE_CACHE_MAX_AGE)
+        if blog_content:
+            print_success("Using cached blog post for this trip.")
+        else:
+            # Fall back to a blog for the same route and dates written for other travelers
+            blog_content = load_blog_from_skeleton(slots)
             if blog_content:
-                print_success("Successfully generated blog with Gemini.")
-        except Exception as e:
-            print_warning(f"Error generating blog with Gemini: {str(e)}")
+                print_success("Adapted a cached blog post from a matching trip.")
+    from_cache = bool(blog_content)
     
-    # If Gemini fails, try with OpenAI
+    # Query the available providers concurrently and keep the first usable blog
     if not blog_content:
-        openai_api_key = get_env_var("OPENAI_API_KEY")
-        if openai_api_key:
-            try:
-                print_info("Generating blog post with OpenAI...")
-                blog_content = generate_blog_with_openai(user_info, partner_info, route_info, openai_api_key)
-                if blog_content:
-                    print_success("Successfully generated blog with OpenAI.")
-            except Exception as e:
-                print_warning(f"Error generating blog with OpenAI: {str(e)}")
+        blog_content = run_blog_generation(
+            user_info, partner_info, route_info,
+            openai_api_key=get_env_var("OPENAI_API_KEY"),
+            gemini_api_key=get_env_var("GEMINI_API_KEY"),
+            slots=slots
+        )
+    
+    # Cache LLM output so the same trip skips the API calls next time
+    if blog_content and BLOG_CACHE_ENABLED and not from_cache:
+        save_cached_response(cache_key, "blog_post", blog_content, RESPONSE_CACHE_DIR)
+        save_blog_skeleton(slots, blog_content)
     
     # If both API methods fail, use a template-based approach
     if not blog_content:
@@ -1764,25 +2050,32 @@ def generate_blog_post(user_info, partner_info, route_info):
         blog_content = generate_blog_with_template(user_info, partner_info, route_info)
     
     # Generate timestamp for filenames
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # Save blog as Markdown
-    md_path = os.path.join(output_dir, f"travel_blog_{timestamp}.md")
-    with open(md_path, "w", encoding="utf-8") as f:
-        f.write(blog_content)
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
     
-    # Convert to HTML
-    html_content = convert_to_html(blog_content, user_info, partner_info, route_info)
-    html_path = os.path.join(output_dir, f"travel_blog_{timestamp}.html")
-    with open(html_path, "w", encoding="utf-8") as f:
-        f.write(html_content)
+    md_path = os.path.join(output_dir, f"travel_blog_{timestamp}.md") if "md" in formats else None
+    html_path = os.path.join(output_dir, f"travel_blog_{timestamp}.html") if "html" in formats else None
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = []
+        
+        # Save blog as Markdown while the HTML version is rendered
+        if md_path:
+            futures.append(executor.submit(write_blog_file, md_path, blog_content))
+        
+        # Convert to HTML, encoding once so it's written as raw bytes
+        if html_path:
+            html_content = convert_to_html(blog_content, user_info, partner_info, route_info)
+            futures.append(executor.submit(write_blog_file, html_path, html_content.encode("utf-8")))
+        
+        for future in futures:
+            future.result()
     
     # Open the HTML file in the default browser
-    try:
-        webbrowser.open(f"file://{os.path.abspath(html_path)}")
-        print_success(f"Blog opened in your web browser: {html_path}")
-    except Exception as e:
-        print_warning(f"Unable to open blog in browser: {str(e)}")
+    if html_path and open_browser:
+        try:
+            open_in_browser(html_path)
+            print_success(f"Blog opened in your web browser: {html_path}")
+        except Exception as e:
+            print_warning(f"Unable to open blog in browser: {str(e)}")
     
     return {
         "content": blog_content,
@@ -1790,68 +2083,79 @@ def generate_blog_post(user_info, partner_info, route_info):
         "html_path": html_path
     }
 
+@functools.lru_cache(maxsize=None)
+def ensure_dir(path):
+    """Create an output directory the first time it's needed; later calls are a cache hit"""
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def write_blog_file(path, content):
+    """Write a blog output file: bytes are written raw, text as UTF-8 with LF line endings on every OS"""
+    if isinstance(content, bytes):
+        with open(path, "wb", buffering=1024 * 1024) as f:
+            f.write(content)
+    else:
+        Path(path).write_text(content, encoding="utf-8", newline="\n")
+
+def blog_cache_key(user_info, partner_info, route_info):
+    """Serialize the blog inputs deterministically so identical trips share a cache entry"""
+    return json.dumps(
+        {"user": user_info, "partner": partner_info, "route": route_info},
+        sort_keys=True,
+        default=str
+    )
+
 def generate_blog_with_llm(user_info, partner_info, route_info, openai_api_key=None, gemini_api_key=None):
     """Generate a blog post using available LLM APIs"""
-    
-    # First try Gemini if available
-    if gemini_api_key:
-        try:
-            return generate_blog_with_gemini(user_info, partner_info, route_info, gemini_api_key)
-        except Exception as e:
-            print_warning(f"Error generating blog with Gemini: {str(e)}")
-            # Fall back to OpenAI if available
-            if openai_api_key:
-                return generate_blog_with_openai(user_info, partner_info, route_info, openai_api_key)
-    
-    # Try OpenAI if available
-    if openai_api_key:
-        try:
-            return generate_blog_with_openai(user_info, partner_info, route_info, openai_api_key)
-        except Exception as e:
-            print_warning(f"Error generating blog with OpenAI: {str(e)}")
+    blog_content = run_blog_generation(user_info, partner_info, route_info, openai_api_key, gemini_api_key)
     
     # Fall back to template if no APIs are available or both failed
-    return generate_blog_with_template(user_info, partner_info, route_info)
+    return blog_content or generate_blog_with_template(user_info, partner_info, route_info)
 
-def generate_blog_with_gemini(user_info, partner_info, route_info, api_key):
-    """Generate a blog post using Gemini API"""
-    import google.generativeai as genai
-    import json
-    
-    print_info("Generating blog post with Gemini...")
-    
-    # Configure the API
-    genai.configure(api_key=api_key)
-    
-    # Set up the model
-    generation_config = {
-        "temperature": 0.8,
-        "top_p": 1,
-        "top_k": 1,
-        "max_output_tokens": 8192,
-    }
-    
-    model = genai.GenerativeModel(
-        model_name="gemini-1.5-pro",
-        generation_config=generation_config
-    )
-    
-    # Create a detailed prompt
-    destination = route_info.get("trip_summary", {}).get("destination", route_info.get("destination", "your destination"))
-    origin = route_info.get("trip_summary", {}).get("origin", route_info.get("origin", "your city"))
-    duration = route_info.get("trip_summary", {}).get("duration", route_info.get("duration", 7))
-    transport_mode = route_info.get("trip_summary", {}).get("transportation", route_info.get("transportation", {}).get("mode", "transportation"))
-    
-    # Get user/partner info
-    user_name = user_info.get("name", user_info.get("real_name", "Traveler"))
-    partner_name = partner_info.get("name", "travel companion") if partner_info else None
-    
-    # Get daily plan if available
-    daily_plan = route_info.get("daily_plan", route_info.get("itinerary", []))
-    
-    blog_prompt = f"""
+def run_blog_generation(user_info, partner_info, route_info, openai_api_key=None, gemini_api_key=None, slots=None):
+    """Race the available LLM providers for a blog post (sync entry point, returns None if all fail)"""
+    return asyncio.run(race_blog_providers(user_info, partner_info, route_info, openai_api_key, gemini_api_key, slots=slots))
+
+async def race_blog_providers(user_info, partner_info, route_info, openai_api_key=None, gemini_api_key=None, slots=None):
+    """Run Gemini and OpenAI concurrently and return the first non-empty blog, cancelling the other"""
+    # Build the prompt once (from the caller's prompt slots, if given) and share it between the providers
+    blog_prompt = build_blog_prompt(user_info, partner_info, route_info, slots=slots)
+    
+    tasks = {}
+    if gemini_api_key and provider_available("gemini"):
+        coro = generate_blog_with_gemini(user_info, partner_info, route_info, gemini_api_key, blog_prompt=blog_prompt)
+        tasks[asyncio.ensure_future(asyncio.wait_for(coro, BLOG_PROVIDER_TIMEOUT))] = "Gemini"
+    if openai_api_key and provider_available("openai"):
+        coro = generate_blog_with_openai(user_info, partner_info, route_info, openai_api_key, blog_prompt=blog_prompt)
+        tasks[asyncio.ensure_future(asyncio.wait_for(coro, BLOG_PROVIDER_TIMEOUT))] = "OpenAI"
+    
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = tasks[task]
+                try:
+                    content = task.result()
+                except asyncio.TimeoutError:
+                    print_warning(f"{name} blog generation timed out after {BLOG_PROVIDER_TIMEOUT}s.")
+                    continue
+                except Exception as e:
+                    print_warning(f"Error generating blog with {name}: {str(e)}")
+                    continue
+                if content:
+                    print_success(f"Successfully generated blog with {name}.")
+                    return content
+        return None
+    finally:
+        # Don't wait on the slower provider once we have a blog
+        for task in pending:
+            task.cancel()
+
+# Blog prompt shared by the Gemini and OpenAI generators, filled in with str.format
+BLOG_PROMPT_TEMPLATE = """
     Write an engaging and personal travel blog post about a {duration}-day trip from {origin} to {destination}.
-    The traveler is {user_name} {'traveling with ' + partner_name if partner_name else 'traveling solo'}.
+    The traveler is {user_name} {companion}.
     They traveled by {transport_mode}.
     
     The blog should be written in first person perspective, as if {user_name} is telling the story.
@@ -1865,71 +2169,280 @@ def generate_blog_with_gemini(user_info, partner_info, route_info, api_key):
     Do not use headers or subheaders in your response.
     Return ONLY the blog post text without any additional formatting or metadata.
     """
+
+def blog_prompt_slots(user_info, partner_info, route_info):
+    """Extract the values that fill BLOG_PROMPT_TEMPLATE from the trip details"""
+    trip_summary = route_info.get("trip_summary", {})
+    partner_name = partner_info.get("name", "travel companion") if partner_info else None
+    
+    return {
+        "destination": trip_summary.get("destination", route_info.get("destination", "your destination")),
+        "origin": trip_summary.get("origin", route_info.get("origin", "your city")),
+        "duration": trip_summary.get("duration", route_info.get("duration", 7)),
+        "transport_mode": trip_summary.get("transportation", route_info.get("transportation", {}).get("mode", "transportation")),
+        "user_name": user_info.get("name", user_info.get("real_name", "Traveler")),
+        "partner_name": partner_name,
+        "companion": 'traveling with ' + partner_name if partner_name else 'traveling solo'
+    }
+
+def build_blog_prompt(user_info, partner_info, route_info, slots=None):
+    """Build the blog prompt sent to either LLM provider, reusing already extracted prompt slots if given"""
+    if slots is None:
+        slots = blog_prompt_slots(user_info, partner_info, route_info)
+    return BLOG_PROMPT_TEMPLATE.format(**slots)
+
+def blog_skeleton_key(slots):
+    """Key a blog by the prompt slots that shape its content, leaving out the traveler names"""
+    skeleton = {k: v for k, v in slots.items() if k not in ("user_name", "partner_name", "companion")}
+    skeleton["solo"] = slots["partner_name"] is None
+    return BLOG_PROMPT_TEMPLATE + json.dumps(skeleton, sort_keys=True, default=str)
+
+def load_blog_from_skeleton(slots):
+    """Reuse a blog written for a structurally identical trip, filling in the new traveler names"""
+    cached = load_cached_response(blog_skeleton_key(slots), "blog_post_skeleton", RESPONSE_CACHE_DIR, max_age=RESPONSE_CACHE_MAX_AGE)
+    if not cached or "template" not in cached:
+        return None
+    
+    # One substitution pass, so swapped names (Alice/Bob -> Bob/Alice) can't overwrite each other
+    return string.Template(cached["template"]).safe_substitute(
+        user_name=slots["user_name"],
+        partner_name=slots["partner_name"] or ""
+    )
+
+def save_blog_skeleton(slots, blog_content):
+    """Store a generated blog with its traveler names replaced by placeholders, so similar trips can reuse it"""
+    placeholders = {"$": "$$", slots["user_name"]: "${user_name}"}
+    if slots["partner_name"] and slots["partner_name"] != slots["user_name"]:
+        placeholders[slots["partner_name"]] = "${partner_name}"
+    
+    # Whole-word matches only ("Al" must not touch "also"), longest name first, in a single pass;
+    # literal "$" is escaped so string.Template leaves it alone when the blog is reused
+    names = sorted((name for name in placeholders if name != "$"), key=len, reverse=True)
+    pattern = r"\$|" + "|".join(rf"(?<!\w){re.escape(name)}(?!\w)" for name in names)
+    template = re.sub(pattern, lambda match: placeholders[match.group(0)], blog_content)
+    
+    save_cached_response(blog_skeleton_key(slots), "blog_post_skeleton", {"template": template}, RESPONSE_CACHE_DIR)
+
+async def generate_blog_with_gemini(user_info, partner_info, route_info, api_key, blog_prompt=None):
+    """Generate a blog post using Gemini API (coroutine, run with asyncio.run from sync code)"""
+    print_info("Generating blog post with Gemini...")
+    
+    # Set up the model
+    generation_config = {
+        "temperature": 0.8,
+        "top_p": 1,
+        "top_k": 1,
+        "max_output_tokens": 8192,
+    }
+    
+    # Build the model per call: its async client is bound to the event loop it first runs on,
+    # and each blog run (asyncio.run) uses a new loop, so a cached model would fail next time
+    genai = get_gemini_client(api_key)
+    model = genai.GenerativeModel(model_name="gemini-1.5-pro", generation_config=generation_config)
+    
+    # Create a detailed prompt unless the caller already built one
+    if blog_prompt is None:
+        blog_prompt = build_blog_prompt(user_info, partner_info, route_info)
     
     try:
-        response = model.generate_content(blog_prompt)
-        blog_content = response.text.strip()
+        # Stream the response so chunks are collected as they're generated
+        response = await model.generate_content_async(
+            blog_prompt, stream=True, request_options=gemini_request_options(is_async=True)
+        )
+        chunks = []
+        async for chunk in response:
+            chunks.append(chunk.text)
+        blog_content = "".join(chunks).strip()
         return blog_content
     except Exception as e:
         print_warning(f"Error in Gemini blog generation: {str(e)}")
+        record_provider_error("gemini", e)
         return None
 
-def generate_blog_with_openai(user_info, partner_info, route_info, api_key):
-    """Generate a blog post using OpenAI API"""
-    import openai
+async def generate_blog_with_openai(user_info, partner_info, route_info, api_key, blog_prompt=None):
+    """Generate a blog post using OpenAI API (coroutine, run with asyncio.run from sync code)"""
+    from openai import AsyncOpenAI
     
     print_info("Generating blog post with OpenAI...")
     
-    # Configure the API
-    openai.api_key = api_key
+    try:
+        # Async clients are bound to the event loop they're used on, so each call opens its own
+        # and closes it (and its connection pool) before the loop ends
+        async with AsyncOpenAI(api_key=api_key, timeout=LLM_REQUEST_TIMEOUT, max_retries=OPENAI_MAX_RETRIES) as client:
+            # Call the API for text generation, streaming the response as it's generated
+            stream = await client.chat.completions.create(
+                **build_openai_blog_request(user_info, partner_info, route_info, blog_prompt=blog_prompt),
+                stream=True
+            )
+            
+            chunks = []
+            async for chunk in stream:
+                if chunk.choices:
+                    chunks.append(chunk.choices[0].delta.content or "")
+        blog_content = "".join(chunks).strip()
+        return blog_content
+    except Exception as e:
+        print_warning(f"Error in OpenAI blog generation: {str(e)}")
+        record_provider_error("openai", e)
+        return None
+
+def build_openai_blog_request(user_info, partner_info, route_info, blog_prompt=None):
+    """Build the chat completion request body for an OpenAI blog post"""
+    # Create a detailed prompt unless the caller already built one
+    if blog_prompt is None:
+        blog_prompt = build_blog_prompt(user_info, partner_info, route_info)
     
-    # Create a detailed prompt
-    destination = route_info.get("trip_summary", {}).get("destination", route_info.get("destination", "your destination"))
-    origin = route_info.get("trip_summary", {}).get("origin", route_info.get("origin", "your city"))
-    duration = route_info.get("trip_summary", {}).get("duration", route_info.get("duration", 7))
-    transport_mode = route_info.get("trip_summary", {}).get("transportation", route_info.get("transportation", {}).get("mode", "transportation"))
+    return {
+        "model": "gpt-4",
+        "messages": [
+            {"role": "system", "content": "You are a skilled travel writer who creates engaging blog posts."},
+            {"role": "user", "content": blog_prompt}
+        ],
+        "max_tokens": 1500,
+        "temperature": 0.7
+    }
+
+def generate_blogs_with_openai_batch(cases, api_key, poll_interval=30, timeout=24 * 60 * 60):
+    """
+    Generate blog posts for many trips at once through the OpenAI Batch API.
     
-    # Get user/partner info
-    user_name = user_info.get("name", user_info.get("real_name", "Traveler"))
-    partner_name = partner_info.get("name", "travel companion") if partner_info else None
+    Batch jobs are billed at half price and use a separate rate-limit pool,
+    but can take up to 24 hours, so this is meant for bulk/offline runs.
     
-    # Get daily plan if available
-    daily_plan = route_info.get("daily_plan", route_info.get("itinerary", []))
+    Args:
+        cases: List of (user_info, partner_info, route_info) tuples
+        api_key: OpenAI API key
+        poll_interval: Seconds to wait between batch status checks
+        timeout: Seconds to wait for the batch before giving up
+        
+    Returns:
+        List of blog texts in the same order as cases (None for failed requests)
+    """
+    client = get_openai_client(api_key)
+    results = [None] * len(cases)
+    if not cases:
+        return results
+    
+    # Write one chat completion request per trip to a JSONL file
+    output_dir = BLOGS_DIR
+    ensure_dir(output_dir)
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    batch_path = os.path.join(output_dir, f"blog_batch_{timestamp}.jsonl")
+    with open(batch_path, "w", encoding="utf-8") as f:
+        for i, (user_info, partner_info, route_info) in enumerate(cases):
+            request = {
+                "custom_id": f"blog-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": build_openai_blog_request(user_info, partner_info, route_info)
+            }
+            f.write(json.dumps(request) + "\n")
     
-    blog_prompt = f"""
-    Write an engaging and personal travel blog post about a {duration}-day trip from {origin} to {destination}.
-    The traveler is {user_name} {'traveling with ' + partner_name if partner_name else 'traveling solo'}.
-    They traveled by {transport_mode}.
+    try:
+        # Upload the requests and submit the batch
+        with open(batch_path, "rb") as f:
+            batch_file = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        print_info(f"Submitted OpenAI batch {batch.id} with {len(cases)} blog requests.")
+        
+        # Poll until the batch reaches a final state
+        deadline = time.time() + timeout
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            if time.time() > deadline:
+                print_warning(f"OpenAI batch {batch.id} did not finish in time (status: {batch.status}).")
+                return results
+            time.sleep(poll_interval)
+            batch = client.batches.retrieve(batch.id)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            print_warning(f"OpenAI batch {batch.id} ended with status: {batch.status}")
+            return results
+        
+        # Match each response back to its trip by custom_id
+        output = client.files.content(batch.output_file_id).text
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            record = _json_loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            idx = int(record["custom_id"].split("-", 1)[1])
+            results[idx] = response["body"]["choices"][0]["message"]["content"].strip()
+        
+        print_success(f"OpenAI batch {batch.id} completed: {sum(r is not None for r in results)}/{len(cases)} blogs generated.")
+    except Exception as e:
+        print_warning(f"Error in OpenAI batch blog generation: {str(e)}")
     
-    The blog should be written in first person perspective, as if {user_name} is telling the story.
-    Make it conversational, engaging, and authentic. Include personal observations, emotions, and experiences.
+    return results
+
+async def generate_blogs_batch(cases, max_concurrent=10):
+    """
+    Generate and save blog posts for many trips concurrently.
     
-    The blog should have a well-structured flow with an introduction, body paragraphs, and conclusion.
-    Use descriptive language to paint vivid pictures of the locations visited.
-    Include references to local culture, food, and experiences.
+    Each trip races the available providers like generate_blog_post, with at most
+    max_concurrent trips talking to the APIs at once. Trips already in the blog cache
+    skip the APIs, identical trips in the batch share one generation, and trips where
+    every provider fails fall back to the template blog.
     
-    The blog should be 800-1200 words total.
-    Do not use headers or subheaders in your response.
-    Return ONLY the blog post text without any additional formatting or metadata.
+    Args:
+        cases: List of (user_info, partner_info, route_info) tuples
+        max_concurrent: Maximum number of trips generating at the same time
+        
+    Returns:
+        List of {"content", "file_path", "html_path"} dicts in the same order as cases
     """
+    openai_api_key = get_env_var("OPENAI_API_KEY")
+    gemini_api_key = get_env_var("GEMINI_API_KEY")
+    semaphore = asyncio.Semaphore(max_concurrent)
     
-    try:
-        # Call the API for text generation
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a skilled travel writer who creates engaging blog posts."},
-                {"role": "user", "content": blog_prompt}
-            ],
-            max_tokens=1500,
-            temperature=0.7
-        )
-        
-        blog_content = response.choices[0].message.content.strip()
+    output_dir = BLOGS_DIR
+    ensure_dir(output_dir)
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    
+    # One generation task per distinct trip, keyed like the blog cache
+    blog_tasks = {}
+    
+    async def generate_content(cache_key, user_info, partner_info, route_info):
+        if BLOG_CACHE_ENABLED:
+            blog_content = load_cached_response(cache_key, "blog_post", RESPONSE_CACHE_DIR, max_age=RESPONSE_CACHE_MAX_AGE)
+            if blog_content:
+                return blog_content
+        async with semaphore:
+            blog_content = await race_blog_providers(
+                user_info, partner_info, route_info, openai_api_key, gemini_api_key
+            )
+        if not blog_content:
+            return generate_blog_with_template(user_info, partner_info, route_info)
+        if BLOG_CACHE_ENABLED:
+            save_cached_response(cache_key, "blog_post", blog_content, RESPONSE_CACHE_DIR)
         return blog_content
-    except Exception as e:
-        print_warning(f"Error in OpenAI blog generation: {str(e)}")
-        return None
+    
+    async def generate_one(index, user_info, partner_info, route_info):
+        cache_key = blog_cache_key(user_info, partner_info, route_info)
+        if cache_key not in blog_tasks:
+            blog_tasks[cache_key] = asyncio.ensure_future(
+                generate_content(cache_key, user_info, partner_info, route_info)
+            )
+        blog_content = await blog_tasks[cache_key]
+        
+        # Number the files so trips finishing in the same second don't overwrite each other
+        md_path = os.path.join(output_dir, f"travel_blog_{timestamp}_{index + 1}.md")
+        html_path = os.path.join(output_dir, f"travel_blog_{timestamp}_{index + 1}.html")
+        html_content = convert_to_html(blog_content, user_info, partner_info, route_info)
+        await asyncio.gather(
+            asyncio.to_thread(write_blog_file, md_path, blog_content),
+            asyncio.to_thread(write_blog_file, html_path, html_content.encode("utf-8"))
+        )
+        return {"content": blog_content, "file_path": md_path, "html_path": html_path}
+    
+    results = await asyncio.gather(*(generate_one(i, *case) for i, case in enumerate(cases)))
+    print_success(f"Generated {len(results)} blog posts in {output_dir}")
+    return results
 
 def generate_blog_with_template(user_info, partner_info, route_info):
     """Generate a blog post using a template approach"""
@@ -1939,10 +2452,27 @@ def generate_blog_with_template(user_info, partner_info, route_info):
     duration = route_info.get("trip_summary", {}).get("duration", route_info.get("duration", 7))
     transportation = route_info.get("trip_summary", {}).get("transportation", route_info.get("transportation", {}).get("mode", "transportation"))
     
-    # Get user/partner info
-    user_name = user_info.get("name", user_info.get("real_name", "Traveler"))
+    # Get partner info
     partner_name = partner_info.get("name", "my travel companion") if partner_info else None
-    
+
+    # Check if we have daily_plan or itinerary
+    daily_plan = route_info.get("daily_plan", route_info.get("itinerary", []))
+
+    # Key the cache on one JSON string so identical trips skip regeneration; route values
+    # (e.g. from Gemini) can be dicts or lists, which can't be lru_cache arguments themselves
+    trip_json = json.dumps(
+        [destination, origin, duration, transportation, partner_name, daily_plan],
+        sort_keys=True,
+        default=str
+    )
+
+    return _template_blog(trip_json)
+
+@functools.lru_cache(maxsize=256)
+def _template_blog(trip_json):
+    """Build the template blog text for a trip (memoized on the trip parameters)"""
+    destination, origin, duration, transportation, partner_name, daily_plan = json.loads(trip_json)
+
     # Create title
     title = f"My {duration}-day Adventure to {destination}"
     
@@ -1953,17 +2483,14 @@ The trip began in {origin}, and I chose to travel by {transportation}.
 """
 
     # Add partner info if available
-    if partner_info:
+    if partner_name:
         intro += f" I was fortunate to have {partner_name} join me on this adventure, which made the experience even more memorable."
     else:
         intro += " I decided to travel solo, allowing me to fully immerse myself in the experience at my own pace."
     
-    # Generate day-by-day content
-    daily_content = ""
-    
-    # Check if we have daily_plan or itinerary
-    daily_plan = route_info.get("daily_plan", route_info.get("itinerary", []))
-    
+    # Generate day-by-day content, collected as sections and joined once at the end
+    day_sections = []
+
     if daily_plan:
         # For each day in the itinerary
         for day_info in daily_plan[:min(len(daily_plan), duration)]:
@@ -1971,11 +2498,13 @@ The trip began in {origin}, and I chose to travel by {transportation}.
             day_date = day_info.get("date", "")
             day_title = f"Day {day_num}: {day_date}"
             
-            # Get activities
-            activities = day_info.get("activities", [])
-            morning = next((a.get("description", a.get("activity", "Explored the area")) for a in activities if a.get("time", "").lower() == "morning"), day_info.get("morning", "Explored the area"))
-            afternoon = next((a.get("description", a.get("activity", "Continued sightseeing")) for a in activities if a.get("time", "").lower() == "afternoon"), day_info.get("afternoon", "Continued sightseeing"))
-            evening = next((a.get("description", a.get("activity", "Enjoyed the local cuisine")) for a in activities if a.get("time", "").lower() == "evening"), day_info.get("evening", "Enjoyed the local cuisine"))
+            # Get activities, keyed by normalized time of day (first activity per slot wins)
+            activities = {}
+            for a in day_info.get("activities", []):
+                activities.setdefault(a.get("time", "").lower(), a)
+            morning = activities["morning"].get("description", activities["morning"].get("activity", "Explored the area")) if "morning" in activities else day_info.get("morning", "Explored the area")
+            afternoon = activities["afternoon"].get("description", activities["afternoon"].get("activity", "Continued sightseeing")) if "afternoon" in activities else day_info.get("afternoon", "Continued sightseeing")
+            evening = activities["evening"].get("description", activities["evening"].get("activity", "Enjoyed the local cuisine")) if "evening" in activities else day_info.get("evening", "Enjoyed the local cuisine")
             
             # Get accommodation
             accommodation = day_info.get("accommodation", {}).get("name", day_info.get("accommodation", "a local hotel"))
@@ -1983,7 +2512,7 @@ The trip began in {origin}, and I chose to travel by {transportation}.
                 accommodation = accommodation.get("name", "a local hotel")
             
             # Create day content
-            daily_content += f"""
+            day_sections.append(f"""
 ## {day_title}
 
 In the morning, I {morning.lower() if morning[0].isupper() else morning}. 
@@ -1995,22 +2524,23 @@ This was definitely a highlight of the day and provided a deeper understanding o
 As evening approached, I {evening.lower() if evening[0].isupper() else evening}. 
 I stayed at {accommodation} for the night, which provided a comfortable place to rest and reflect on the day's adventures.
 
-"""
+""")
     else:
         # Create generic daily content if no specific itinerary provided
         for day in range(1, duration + 1):
-            daily_content += f"""
+            day_sections.append(f"""
 ## Day {day}
 
 On this day, I explored {destination} and discovered its unique charm. The morning was spent visiting local attractions,
 followed by a delightful lunch sampling the regional cuisine. In the afternoon, I continued my exploration, 
 taking in the sights and sounds of this wonderful place. The evening was a perfect time to relax and reflect on the day's adventures.
 
-"""
+""")
+    daily_content = "".join(day_sections)
     
     # Create conclusion
     conclusion = f"""
-My trip to {destination} was truly a remarkable experience. {'Traveling with ' + partner_name + ' added a special dimension to the journey.' if partner_info else 'Traveling solo allowed me to fully immerse myself in the experience.'} 
+My trip to {destination} was truly a remarkable experience. {'Traveling with ' + partner_name + ' added a special dimension to the journey.' if partner_name else 'Traveling solo allowed me to fully immerse myself in the experience.'} 
 The {duration} days spent exploring this beautiful destination provided memories that will last a lifetime. 
 From the moment we left {origin} until our return, every aspect of the journey contributed to an unforgettable adventure.
 
@@ -2022,39 +2552,9 @@ If you're considering a trip to {destination}, I highly recommend it. The cultur
     
     return blog_content
 
-def convert_to_html(blog_content, user_info, partner_info, route_info):
-    """Convert the blog content to HTML with styling"""
-    # Extract destination from route_info
-    destination = route_info.get("trip_summary", {}).get("destination", route_info.get("destination", "Your Destination"))
-    
-    # Convert markdown content to HTML
-    try:
-        # Try to use markdown library if available
-        import markdown
-        content_html = markdown.markdown(blog_content)
-    except ImportError:
-        # Simple conversion if markdown library not available
-        content_html = blog_content.replace('\n\n', '</p><p>')
-        content_html = content_html.replace('\n', '<br>')
-        content_html = f'<p>{content_html}</p>'
-        content_html = content_html.replace('## ', '</p><h2>')
-        content_html = content_html.replace('# ', '</p><h1>')
-        parts = content_html.split('</h2>')
-        for i in range(1, len(parts)):
-            if not parts[i].startswith('<p>'):
-                parts[i] = '<p>' + parts[i]
-        content_html = '</h2>'.join(parts)
-    
-    # HTML template with CSS
-    html_template = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Travel Blog: {destination}</title>
-        <style>
-            :root {{
+# Static stylesheet for blog pages, built once instead of on every render
+BLOG_CSS = """<style>
+            :root {
                 --primary-color: #4a6fa5;
                 --secondary-color: #ff9e5e;
                 --background-color: #f9f9f9;
@@ -2063,123 +2563,133 @@ def convert_to_html(blog_content, user_info, partner_info, route_info):
                 --light-accent: #ffeedd;
                 --font-main: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
                 --font-accent: 'Georgia', serif;
-            }}
+            }
             
-            body {{
+            body {
                 font-family: var(--font-main);
                 line-height: 1.6;
                 color: var(--text-color);
                 background-color: var(--background-color);
                 margin: 0;
                 padding: 0;
-            }}
+            }
             
-            .container {{
+            .container {
                 max-width: 800px;
                 margin: 0 auto;
                 padding: 20px;
                 background-color: white;
                 box-shadow: 0 0 20px rgba(0,0,0,0.1);
-            }}
+            }
             
-            header {{
+            header {
                 text-align: center;
                 padding-bottom: 20px;
                 border-bottom: 2px solid var(--light-accent);
                 margin-bottom: 30px;
-            }}
+            }
             
-            h1 {{
+            h1 {
                 color: var(--primary-color);
                 font-family: var(--font-accent);
                 font-size: 2.5em;
                 margin-bottom: 5px;
-            }}
+            }
             
-            h2 {{
+            h2 {
                 color: var(--primary-color);
                 font-family: var(--font-accent);
                 border-bottom: 1px solid var(--light-accent);
                 padding-bottom: 10px;
                 margin-top: 30px;
-            }}
+            }
             
-            .subtitle {{
+            .subtitle {
                 color: var(--secondary-color);
                 font-size: 1.2em;
                 font-style: italic;
                 margin-top: 0;
-            }}
+            }
             
-            .meta {{
+            .meta {
                 display: flex;
                 justify-content: space-between;
                 margin: 20px 0;
                 font-size: 0.9em;
                 color: #666;
                 flex-wrap: wrap;
-            }}
+            }
             
-            .meta-item {{
+            .meta-item {
                 background-color: var(--light-accent);
                 padding: 5px 10px;
                 border-radius: 15px;
                 margin: 5px;
-            }}
+            }
             
-            .content {{
+            .content {
                 margin-top: 20px;
-            }}
+            }
             
-            p {{
+            p {
                 margin-bottom: 1.2em;
-            }}
+            }
             
-            blockquote {{
+            blockquote {
                 background-color: var(--light-accent);
                 border-left: 5px solid var(--accent-color);
                 padding: 15px;
                 margin: 20px 0;
                 font-style: italic;
-            }}
+            }
             
-            img {{
+            img {
                 max-width: 100%;
                 height: auto;
                 border-radius: 8px;
                 margin: 20px 0;
-            }}
+            }
             
-            .highlight {{
+            .highlight {
                 background-color: var(--light-accent);
                 padding: 3px 5px;
                 border-radius: 3px;
-            }}
+            }
             
-            footer {{
+            footer {
                 text-align: center;
                 margin-top: 50px;
                 padding-top: 20px;
                 border-top: 2px solid var(--light-accent);
                 color: #666;
                 font-size: 0.9em;
-            }}
+            }
             
             /* Responsive */
-            @media (max-width: 600px) {{
-                .container {{
+            @media (max-width: 600px) {
+                .container {
                     padding: 15px;
-                }}
+                }
                 
-                h1 {{
+                h1 {
                     font-size: 2em;
-                }}
+                }
                 
-                .meta {{
+                .meta {
                     flex-direction: column;
-                }}
-            }}
-        </style>
+                }
+            }
+        </style>"""
+
+# Page layout for rendered blog posts; BLOG_CSS is passed in as {css} so its braces need no escaping
+BLOG_HTML_TEMPLATE = """
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Travel Blog: {destination}</title>
+        {css}
     </head>
     <body>
         <div class="container">
@@ -2189,10 +2699,10 @@ def convert_to_html(blog_content, user_info, partner_info, route_info):
             </header>
             
             <div class="meta">
-                <span class="meta-item">📅 Date: {datetime.now().strftime('%B %d, %Y')}</span>
+                <span class="meta-item">📅 Date: {generated_date}</span>
                 <span class="meta-item">✈️ Destination: {destination}</span>
-                <span class="meta-item">👤 Traveler: {user_info.get('name', user_info.get('real_name', 'Anonymous'))}</span>
-                {f'<span class="meta-item">👥 Travel Partner: {partner_info.get("name", "Solo")}</span>' if partner_info else ''}
+                <span class="meta-item">👤 Traveler: {user_name}</span>
+                {partner_line}
             </div>
             
             <div class="content">
@@ -2200,52 +2710,131 @@ def convert_to_html(blog_content, user_info, partner_info, route_info):
             </div>
             
             <footer>
-                <p>Generated by WanderMatch | {datetime.now().strftime('%Y')}</p>
+                <p>Generated by WanderMatch | {generated_year}</p>
             </footer>
         </div>
     </body>
     </html>
     """
+
+@functools.lru_cache(maxsize=1)
+def get_markdown_renderer():
+    """Import a markdown renderer on first use: markdown-it-py if installed, else markdown, else None"""
+    try:
+        from markdown_it import MarkdownIt
+        return MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"]).render
+    except ImportError:
+        pass
     
-    return html_template
+    try:
+        import markdown
+        return markdown.markdown
+    except ImportError:
+        return None
+
+@functools.lru_cache(maxsize=64)
+def _md_to_html(blog_content):
+    """Convert blog markdown to HTML, memoized so re-rendering the same post skips the parse"""
+    render = get_markdown_renderer()
+    if render is not None:
+        return render(blog_content)
+    
+    # Simple conversion if no markdown library is available
+    content_html = blog_content.replace('\n\n', '</p><p>')
+    content_html = content_html.replace('\n', '<br>')
+    content_html = f'<p>{content_html}</p>'
+    content_html = content_html.replace('## ', '</p><h2>')
+    content_html = content_html.replace('# ', '</p><h1>')
+    parts = content_html.split('</h2>')
+    for i in range(1, len(parts)):
+        if not parts[i].startswith('<p>'):
+            parts[i] = '<p>' + parts[i]
+    content_html = '</h2>'.join(parts)
+    return content_html
+
+def convert_to_html(blog_content, user_info, partner_info, route_info):
+    """Convert the blog content to HTML with styling"""
+    # Extract destination from route_info
+    destination = route_info.get("trip_summary", {}).get("destination", route_info.get("destination", "Your Destination"))
+    
+    # Convert markdown content to HTML
+    content_html = _md_to_html(blog_content)
+    
+    # Fill in the HTML page template
+    now = time.localtime()
+    partner_line = f'<span class="meta-item">👥 Travel Partner: {partner_info.get("name", "Solo")}</span>' if partner_info else ''
+    return BLOG_HTML_TEMPLATE.format(
+        css=BLOG_CSS,
+        destination=destination,
+        generated_date=time.strftime('%B %d, %Y', now),
+        user_name=user_info.get('name', user_info.get('real_name', 'Anonymous')),
+        partner_line=partner_line,
+        content_html=content_html,
+        generated_year=time.strftime('%Y', now)
+    )
+
+# Defaults for missing survey / user pool fields, shared by every profile loader
+DEFAULT_PROFILE_VALUES = {
+    'real_name': 'Anonymous Traveler',
+    'age_group': '25–34',
+    'gender': 'Not specified',
+    'nationality': 'International',
+    'preferred_residence': 'Various locations',
+    'cultural_symbol': 'Local cuisine',
+    'bucket_list': 'Nature exploration',
+    'healthcare_expectations': 'Basic healthcare access',
+    'travel_budget': '$1000',
+    'currency_preferences': 'Credit card',
+    'insurance_type': 'Basic travel',
+    'past_insurance_issues': 'None'
+}
+DEFAULT_PARTNER_VALUES = {**DEFAULT_PROFILE_VALUES, 'real_name': 'Travel Partner'}
+
+# Profile used when no survey answers or user pool data can be loaded
+DEFAULT_USER_INFO = {
+    "name": "Anonymous Traveler",
+    "age": "30",
+    "gender": "Not specified",
+    "nationality": "International",
+    "interests": ("Local culture", "Nature exploration"),
+    "budget_preference": "Medium",
+    "travel_style": "Cultural"
+}
+
+def list_survey_answer_files(backend_dir):
+    """Return the names of the user_answer_*.csv survey files in a directory"""
+    # One scandir pass that filters entries as they're read, instead of listing every name first
+    with os.scandir(backend_dir) as entries:
+        return [
+            entry.name for entry in entries
+            if entry.name.startswith("user_answer_") and entry.name.endswith(".csv")
+        ]
 
 def select_travel_partner(user_info):
     """Select a compatible travel partner using the recommendation API and embeddings"""
     print_header("Travel Partner Selection")
     
     # Path to get_user_info folder
-    get_user_info_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "get_user_info")
-    backend_dir = os.path.join(get_user_info_dir, "backend")
+    get_user_info_dir = GET_USER_INFO_DIR
+    backend_dir = SURVEY_BACKEND_DIR
     user_pool_path = os.path.join(get_user_info_dir, "user_pool.csv")
     app_path = os.path.join(backend_dir, "app.py")
     
     # Default values for NaN or blank fields
-    default_values = {
-        'real_name': 'Travel Partner',
-        'age_group': '25–34',
-        'gender': 'Not specified',
-        'nationality': 'International',
-        'preferred_residence': 'Various locations',
-        'cultural_symbol': 'Local cuisine',
-        'bucket_list': 'Nature exploration',
-        'healthcare_expectations': 'Basic healthcare access',
-        'travel_budget': '$1000',
-        'currency_preferences': 'Credit card',
-        'insurance_type': 'Basic travel',
-        'past_insurance_issues': 'None'
-    }
+    default_values = DEFAULT_PARTNER_VALUES
     
     # List to store all potential partners
     potential_partners = []
     
+    # Look for survey answers first so we only probe or start the API when there is something to match
+    csv_files = []
+    if os.path.isdir(backend_dir):
+        csv_files = list_survey_answer_files(backend_dir)
+    
     # First check if app.py exists for the recommendation API
-    if os.path.exists(app_path):
+    if os.path.exists(app_path) and csv_files:
         try:
-            import subprocess
-            import sys
-            import time
             import requests
-            import json
             import pandas as pd
             import numpy as np
             
@@ -2284,15 +2873,14 @@ def select_travel_partner(user_info):
                         time.sleep(1)
             
             if api_running:
-                # Check if we have user answers from the survey
-                csv_files = [f for f in os.listdir(backend_dir) if f.startswith("user_answer_") and f.endswith(".csv")]
+                # Use the user answers from the survey
                 if csv_files:
-                    # Sort files by timestamp to get the most recent one
-                    latest_file = sorted(csv_files, reverse=True)[0]
+                    # Timestamped names sort chronologically, so the largest is the most recent one
+                    latest_file = max(csv_files)
                     user_csv_path = os.path.join(backend_dir, latest_file)
                     
                     # Read the user data
-                    user_df = pd.read_csv(user_csv_path)
+                    user_df = pd.read_csv(user_csv_path, nrows=1)
                     
                     if not user_df.empty:
                         # Use the recommendation API to find matching partners
@@ -2378,14 +2966,11 @@ def select_travel_partner(user_info):
     
     # If we don't have enough partners, try using embed_info.py
     if len(potential_partners) < 3:
-        embed_info_path = os.path.join(get_user_info_dir, "embed_info.py")
+        embed_info_path = EMBED_INFO_PATH
         if os.path.exists(embed_info_path):
             try:
-                import subprocess
-                import sys
                 import pandas as pd
                 import numpy as np
-                import json
                 
                 print_info("Using embed_info.py to calculate match scores...")
                 
@@ -2434,6 +3019,9 @@ def select_travel_partner(user_info):
                                             lambda x: default_values[col] if pd.isna(x) or x == '' else x
                                         )
                                 
+                                # Names already selected, for O(1) duplicate checks
+                                selected_names = {p.get("name") for p in potential_partners}
+                                
                                 # Process each match (up to 5)
                                 for _, row in matches_df.iterrows():
                                     if len(potential_partners) >= 5:
@@ -2442,14 +3030,8 @@ def select_travel_partner(user_info):
                                     match_idx = row.get("User Index", 0)
                                     match_score = row.get("Score", 0) * 100  # Convert to percentage
                                     
-                                    # Check if we already have this partner
-                                    partner_exists = False
-                                    for existing_partner in potential_partners:
-                                        if existing_partner.get("name") == user_pool_df.iloc[match_idx].get("real_name", "Travel Partner"):
-                                            partner_exists = True
-                                            break
-                                    
-                                    if not partner_exists and match_idx < len(user_pool_df):
+                                    # Skip out-of-range indices and partners we already have
+                                    if match_idx < len(user_pool_df) and user_pool_df.iloc[match_idx].get("real_name", "Travel Partner") not in selected_names:
                                         partner_data = user_pool_df.iloc[match_idx].to_dict()
                                         
                                         # Ensure all fields have values
@@ -2477,6 +3059,7 @@ def select_travel_partner(user_info):
                                         
                                         # Add to potential partners list
                                         potential_partners.append(partner)
+                                        selected_names.add(partner["name"])
                 else:
                     print_warning(f"Match calculation returned code {embed_process.returncode}")
                     print_warning(f"Error: {embed_process.stderr}")
@@ -2700,6 +3283,13 @@ def clear_screen():
     else:  # For Unix/Linux/MacOS
         os.system('clear')
 
+# ANSI codes for the supported header colors
+HEADER_COLOR_CODES = {
+    "blue": "1;34",
+    "green": "1;32",
+    "red": "1;31"
+}
+
 def print_header(text, emoji="🌍", color="blue", centered=True):
     """Print a formatted header with optional styling"""
     terminal_width = 80
@@ -2715,12 +3305,9 @@ def print_header(text, emoji="🌍", color="blue", centered=True):
         text = f"{emoji} {text}"
     
     # Print with color if specified
-    if color == "blue":
-        print(f"\033[1;34m{text}\033[0m")
-    elif color == "green":
-        print(f"\033[1;32m{text}\033[0m")
-    elif color == "red":
-        print(f"\033[1;31m{text}\033[0m")
+    color_code = HEADER_COLOR_CODES.get(color)
+    if color_code:
+        print(f"\033[{color_code}m{text}\033[0m")
     else:
         print(text)
 
@@ -2729,6 +3316,11 @@ def print_subheader(text):
     print(f"\n\033[1m{text}\033[0m")
     print("-" * len(text))
 
+def print_key_values(data):
+    """Print one "key: value" line per item using a single buffered write"""
+    sys.stdout.write("".join(f"{key}: {value}\n" for key, value in data.items()))
+    sys.stdout.flush()
+
 def print_info(text):
     """Print information message"""
     print(f"\033[0;34mℹ️  {text}\033[0m")
@@ -2758,10 +3350,10 @@ def get_user_info():
     print_header("User Profile Collection")
     
     # Path to get_user_info folder
-    get_user_info_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "get_user_info")
-    backend_dir = os.path.join(get_user_info_dir, "backend")
+    get_user_info_dir = GET_USER_INFO_DIR
+    backend_dir = SURVEY_BACKEND_DIR
     frontend_dir = os.path.join(get_user_info_dir, "frontend")
-    embed_info_path = os.path.join(get_user_info_dir, "embed_info.py")
+    embed_info_path = EMBED_INFO_PATH
     
     # Check if the run_info.py script exists
     run_info_path = os.path.join(get_user_info_dir, "run_info.py")
@@ -2771,9 +3363,6 @@ def get_user_info():
         
         try:
             # Run the survey script to collect user info
-            import subprocess
-            import sys
-            import time
             
             # Start the survey process
             survey_process = subprocess.Popen([sys.executable, run_info_path], 
@@ -2822,10 +3411,10 @@ def get_user_info():
             
             # Check for the latest user answer file
             if os.path.exists(backend_dir):
-                csv_files = [f for f in os.listdir(backend_dir) if f.startswith("user_answer_") and f.endswith(".csv")]
+                csv_files = list_survey_answer_files(backend_dir)
                 if csv_files:
-                    # Sort files by timestamp to get the most recent one
-                    latest_file = sorted(csv_files, reverse=True)[0]
+                    # Timestamped names sort chronologically, so the largest is the most recent one
+                    latest_file = max(csv_files)
                     user_csv_path = os.path.join(backend_dir, latest_file)
                     print_info(f"Using user data from: {latest_file}")
                     
@@ -2834,24 +3423,11 @@ def get_user_info():
                         import numpy as np
                         
                         # Read the user data
-                        user_df = pd.read_csv(user_csv_path)
+                        user_df = pd.read_csv(user_csv_path, nrows=1)
                         
                         if not user_df.empty:
                             # Fill NaN values with default values
-                            default_values = {
-                                'real_name': 'Anonymous Traveler',
-                                'age_group': '25–34',
-                                'gender': 'Not specified',
-                                'nationality': 'International',
-                                'preferred_residence': 'Various locations',
-                                'cultural_symbol': 'Local cuisine',
-                                'bucket_list': 'Nature exploration',
-                                'healthcare_expectations': 'Basic healthcare access',
-                                'travel_budget': '$1000',
-                                'currency_preferences': 'Credit card',
-                                'insurance_type': 'Basic travel',
-                                'past_insurance_issues': 'None'
-                            }
+                            default_values = DEFAULT_PROFILE_VALUES
                             
                             # Replace NaN values with defaults
                             user_df = user_df.fillna(default_values)
@@ -2867,8 +3443,7 @@ def get_user_info():
                             
                             # Print user information summary
                             print_subheader("User Information")
-                            for key, value in user_info.items():
-                                print(f"{key}: {value}")
+                            print_key_values(user_info)
                             
                             # Map fields to match the expected format
                             user_info["name"] = user_info.get("real_name", "Anonymous Traveler")
@@ -2911,10 +3486,10 @@ def get_user_info():
     # Check if there are any user_answer_*.csv files in the backend directory
     user_info = {}
     if os.path.exists(backend_dir):
-        csv_files = [f for f in os.listdir(backend_dir) if f.startswith("user_answer_") and f.endswith(".csv")]
+        csv_files = list_survey_answer_files(backend_dir)
         if csv_files:
-            # Sort files by timestamp to get the most recent one
-            latest_file = sorted(csv_files, reverse=True)[0]
+            # Timestamped names sort chronologically, so the largest is the most recent one
+            latest_file = max(csv_files)
             user_csv_path = os.path.join(backend_dir, latest_file)
             print_info(f"Using existing user data from: {latest_file}")
             
@@ -2923,24 +3498,11 @@ def get_user_info():
                 import numpy as np
                 
                 # Read the user data with default values for NaN
-                user_df = pd.read_csv(user_csv_path)
+                user_df = pd.read_csv(user_csv_path, nrows=1)
                 
                 if not user_df.empty:
                     # Fill NaN values with default values
-                    default_values = {
-                        'real_name': 'Anonymous Traveler',
-                        'age_group': '25–34',
-                        'gender': 'Not specified',
-                        'nationality': 'International',
-                        'preferred_residence': 'Various locations',
-                        'cultural_symbol': 'Local cuisine',
-                        'bucket_list': 'Nature exploration',
-                        'healthcare_expectations': 'Basic healthcare access',
-                        'travel_budget': '$1000',
-                        'currency_preferences': 'Credit card',
-                        'insurance_type': 'Basic travel',
-                        'past_insurance_issues': 'None'
-                    }
+                    default_values = DEFAULT_PROFILE_VALUES
                     
                     # Replace NaN values with defaults
                     user_df = user_df.fillna(default_values)
@@ -2956,8 +3518,7 @@ def get_user_info():
                     
                     # Print user information summary
                     print_subheader("User Information")
-                    for key, value in user_info.items():
-                        print(f"{key}: {value}")
+                    print_key_values(user_info)
                     
                     # Map fields to match the expected format
                     user_info["name"] = user_info.get("real_name", "Anonymous Traveler")
@@ -3005,20 +3566,7 @@ def get_user_info():
             
             if not user_pool_df.empty:
                 # Fill NaN values with default values
-                default_values = {
-                    'real_name': 'Anonymous Traveler',
-                    'age_group': '25–34',
-                    'gender': 'Not specified',
-                    'nationality': 'International',
-                    'preferred_residence': 'Various locations',
-                    'cultural_symbol': 'Local cuisine',
-                    'bucket_list': 'Nature exploration',
-                    'healthcare_expectations': 'Basic healthcare access',
-                    'travel_budget': '$1000',
-                    'currency_preferences': 'Credit card',
-                    'insurance_type': 'Basic travel',
-                    'past_insurance_issues': 'None'
-                }
+                default_values = DEFAULT_PROFILE_VALUES
                 
                 # Replace NaN values with defaults
                 user_pool_df = user_pool_df.fillna(default_values)
@@ -3067,8 +3615,7 @@ def get_user_info():
                 
                 # Print user information summary
                 print_subheader("User Information")
-                for key, value in user_info.items():
-                    print(f"{key}: {value}")
+                print_key_values(user_info)
                 
                 return user_info
                 
@@ -3078,17 +3625,8 @@ def get_user_info():
     # If all else fails, use default user info
     print_warning("No user data found. Using default user profile.")
     
-    default_user = {
-        "name": "Anonymous Traveler",
-        "age": "30",
-        "gender": "Not specified",
-        "nationality": "International",
-        "interests": ["Local culture", "Nature exploration"],
-        "budget_preference": "Medium",
-        "travel_style": "Cultural"
-    }
-    
-    return default_user
+    # Copy the shared defaults (with a fresh interests list) so callers can update the profile
+    return {**DEFAULT_USER_INFO, "interests": list(DEFAULT_USER_INFO["interests"])}
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file